@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+# seconds each endpoint's responses stay fresh
+DEFAULT_TTLS = {
+    "rates": 3600,
+    "assets": 60,
+    "history": 300,
+    "markets": 120,
+    "exchanges": 300
+}
+
+# history windows that ended this long ago only contain closed candles
+CLOSED_HISTORY_TTL = 7 * 24 * 3600
+
+INTERVAL_MS = {
+    "m1": 60_000,
+    "m5": 5 * 60_000,
+    "m15": 15 * 60_000,
+    "m30": 30 * 60_000,
+    "h1": 3_600_000,
+    "h2": 2 * 3_600_000,
+    "h6": 6 * 3_600_000,
+    "h12": 12 * 3_600_000,
+    "d1": 24 * 3_600_000
+}
+
+# longest span CoinCap returns in full for one history request, per interval
+HISTORY_SPAN_MS = {
+    "m1": 1 * 24 * 3_600_000,
+    "m5": 5 * 24 * 3_600_000,
+    "m15": 7 * 24 * 3_600_000,
+    "m30": 14 * 24 * 3_600_000,
+    "h1": 30 * 24 * 3_600_000,
+    "h2": 61 * 24 * 3_600_000,
+    "h6": 183 * 24 * 3_600_000,
+    "h12": 365 * 24 * 3_600_000,
+    "d1": 3650 * 24 * 3_600_000
+}
+
+
+class ResponseCache:
+    """Thread-safe TTL cache with LRU eviction bounded by total payload bytes"""
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttls=None):
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """cached value for key, or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key, value, size, ttl):
+        """store value for ttl seconds, evicting least recently used entries over the byte budget"""
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+    
+    def ttl_for(self, endpoint, params=None):
+        """ttl for an endpoint; fully closed history windows are kept effectively forever"""
+        if endpoint == "history" and params:
+            end = params.get("end")
+            interval_ms = INTERVAL_MS.get(params.get("interval"), 0)
+            if end and end + interval_ms < time.time() * 1000:
+                return CLOSED_HISTORY_TTL
+        return self.ttls.get(endpoint, 0)
+    
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes
+            }
+    
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
@@ -4,19 +4,140 @@ import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
+import os
 import sys
 from constants import CONSTANTS
-from coincap_api import CoinCapAPI
-import requests
+from replay_api import make_api
+from api_cache import ResponseCache
+from history_store import HistoryStore
+from api_cache import INTERVAL_MS
+from frames import history_to_frame, build_price_matrix, normalize_matrix
+from correlation import correlation_matrix, cluster_order
+from resample import downsample
+from figure_cache import memo_figure
+from news_index import MentionIndex, DEFAULT_INDEX_PATH
 sys.path.append('..')
 
+@st.cache_resource
+def get_shared_cache():
+    """one response cache per server process, shared by every streamlit session"""
+    return ResponseCache()
+
+@st.cache_resource
+def get_history_store():
+    """candle store shared by every streamlit session so renders only fetch new candles"""
+    return HistoryStore(make_api(cache=get_shared_cache()), max_age_d=90)
+
+@st.cache_resource
+def get_figure_cache():
+    """built figures keyed by a hash of their inputs, reused by every rerun and session"""
+    return ResponseCache(max_bytes=32 * 1024 * 1024)
+
+@st.cache_resource
+def get_news_index(path, mtime):
+    """coin-mention index written by news_index.py, loaded again whenever the file changes"""
+    return MentionIndex.load(path)
+
+def load_news_index():
+    """the news index at NEWS_INDEX_PATH, None until one has been built"""
+    path = os.environ.get("NEWS_INDEX_PATH", DEFAULT_INDEX_PATH)
+    if not os.path.exists(path):
+        return None
+    return get_news_index(path, os.path.getmtime(path))
+
 class EnhancedCryptoVisualizer:
-    def __init__(self):
-        self.api = CoinCapAPI()
+    def __init__(self, api=None, news_index=None):
+        # an explicit api (e.g. ReplayCoinCapAPI) bypasses the shared cache and store
+        if api is None:
+            self.api = make_api(cache=get_shared_cache())
+            self.history_store = get_history_store()
+            self.figure_cache = get_figure_cache()
+            self.news_index = news_index or load_news_index()
+        else:
+            self.api = api
+            self.history_store = HistoryStore(api)
+            self.figure_cache = ResponseCache()
+            self.news_index = news_index
+        self.refresh()
+    
+    def refresh(self):
+        """start a new data snapshot; panels share everything fetched until the next refresh"""
+        self.snapshot_time = datetime.now()
+        self._assets = None
+        self._assets_limit = 0
+        self._histories = {}
+        self._frames = {}
+        self._matrices = {}
+    
+    def get_assets(self, limit=100):
+        """top assets sliced from one superset fetch per snapshot"""
+        if self._assets is None or limit > self._assets_limit:
+            self._assets_limit = max(limit, CONSTANTS['market_metrics']['calcs']['limit'])
+            self._assets = self.api.get_assets(limit=self._assets_limit)
+        return self._assets[:limit]
+    
+    def get_histories(self, asset_ids, interval, lookback_d):
+        """histories keyed by asset id, fetched at most once per (asset, interval, window) per snapshot"""
+        missing = [asset_id for asset_id in dict.fromkeys(asset_ids)
+                   if (asset_id, interval, lookback_d) not in self._histories]
+        if missing:
+            end = int(self.snapshot_time.timestamp() * 1000)
+            start = int((self.snapshot_time - timedelta(days=lookback_d)).timestamp() * 1000)
+            fetched = self.history_store.get_asset_histories(missing, interval=interval, start=start, end=end)
+            for asset_id in missing:
+                # failed fetches are remembered too so they are not retried within the snapshot
+                self._histories[(asset_id, interval, lookback_d)] = fetched.get(asset_id)
+        
+        histories = {}
+        for asset_id in asset_ids:
+            history = self._histories[(asset_id, interval, lookback_d)]
+            if history is not None:
+                histories[asset_id] = history
+        return histories
+    
+    def get_frames(self, asset_ids, interval, lookback_d):
+        """price frames keyed by asset id, converted once per snapshot and shared by the panels"""
+        histories = self.get_histories(asset_ids, interval, lookback_d)
+        frames = {}
+        for asset_id, history in histories.items():
+            key = (asset_id, interval, lookback_d)
+            if key not in self._frames:
+                self._frames[key] = history_to_frame(history)
+            frames[asset_id] = self._frames[key]
+        return frames
+    
+    def get_price_matrix(self, asset_ids, interval, lookback_d):
+        """time-aligned (time x asset) price matrix for the snapshot window
+        
+        One matrix is kept per (interval, window) and only rebuilt when a panel asks
+        for an asset it does not cover yet; panels take their columns from it.
+        """
+        frames = self.get_frames(asset_ids, interval, lookback_d)
+        matrix = self._matrices.get((interval, lookback_d))
+        if matrix is None or any(asset_id not in matrix.columns for asset_id in frames):
+            if matrix is not None:
+                frames = dict(self.get_frames(list(matrix.columns), interval, lookback_d), **frames)
+            end = int(self.snapshot_time.timestamp() * 1000)
+            start = int((self.snapshot_time - timedelta(days=lookback_d)).timestamp() * 1000)
+            matrix = build_price_matrix(frames, INTERVAL_MS[interval], start, end)
+            self._matrices[(interval, lookback_d)] = matrix
+        return matrix[[asset_id for asset_id in dict.fromkeys(asset_ids) if asset_id in matrix.columns]]
+    
+    def prefetch(self, top_n=20):
+        """fetch every panel's histories in one batch and build the shared price matrices once"""
+        asset_ids = [asset['id'] for asset in self.get_assets(limit=top_n)]
+        for groups_ids in CONSTANTS['asset_group_performance']['calcs']['groups'].values():
+            asset_ids.extend(groups_ids)
+        
+        panels = ['asset_risk_profile', 'top_asset_performance', 'price_correlation_matrix', 'asset_group_performance']
+        windows = dict.fromkeys((CONSTANTS[panel]['calcs']['interval'], CONSTANTS[panel]['calcs']['lookback_d'])
+                                for panel in panels)
+        for interval, lookback_d in windows:
+            self.get_price_matrix(asset_ids, interval, lookback_d)
         
     def get_market_metrics(self):
         """calc market metrics"""
-        assets = self.api.get_assets(limit=CONSTANTS['market_metrics']['calcs']['limit'])
+        assets = self.get_assets(limit=CONSTANTS['market_metrics']['calcs']['limit'])
         df = pd.DataFrame(assets)
         df['changePercent24Hr'] = df['changePercent24Hr'].astype(float)
         df['volumeUsd24Hr'] = df['volumeUsd24Hr'].astype(float)
@@ -51,14 +172,18 @@ class EnhancedCryptoVisualizer:
                 st.metric(f"{row['name']} ({row['symbol']})", f"${row['volumeUsd24Hr']:,.0f}")
 
     def get_volatility(self, history_data):
-        """calc volatility from history endpoint"""
-        prices = pd.Series([float(d['priceUsd']) for d in history_data])
-        return np.std(prices.pct_change().dropna()) * 100
+        """calc volatility from a history frame (or raw history endpoint data)"""
+        if not isinstance(history_data, pd.DataFrame):
+            history_data = history_to_frame(history_data)
+        prices = history_data['priceUsd'].to_numpy()
+        if prices.size < 2:
+            return np.nan
+        return np.std(prices[1:] / prices[:-1] - 1) * 100
         
     def create_asset_risk_profile(self):
         """viz asset risk profile"""
         # only look at top 20 assets
-        assets = self.api.get_assets(limit=20)
+        assets = self.get_assets(limit=20)
         lookback_d = CONSTANTS['asset_risk_profile']['calcs']['lookback_d']
         interval_h = CONSTANTS['asset_risk_profile']['calcs']['interval']
         
@@ -69,14 +194,18 @@ class EnhancedCryptoVisualizer:
         names = []
         changes = []
         
+        frames = self.get_frames(
+            [asset['id'] for asset in assets],
+            interval=interval_h,
+            lookback_d=lookback_d
+        )
+        
         for asset in assets:
-            history = self.api.get_asset_history(
-                asset['id'],
-                interval=interval_h,
-                start=int((datetime.now() - timedelta(days=lookback_d)).timestamp() * 1000)
-            )
+            frame = frames.get(asset['id'])
+            if frame is None or frame.empty:
+                continue
             
-            volatilities.append(self.get_volatility(history))
+            volatilities.append(self.get_volatility(frame))
             market_caps.append(float(asset['marketCapUsd']))
             volumes.append(float(asset['volumeUsd24Hr']))
             names.append(asset['name'])
@@ -92,148 +221,202 @@ class EnhancedCryptoVisualizer:
         })
         
         # Create visualization
-        fig = px.scatter(
-            df,
-            x='Market Cap',
-            y='Volatility',
-            size='Volume',
-            color='24h Change',
-            hover_name='Asset',
-            log_x=True,
-            title=CONSTANTS['asset_risk_profile']['dashboard']['title']
-        )
+        def build():
+            fig = px.scatter(
+                df,
+                x='Market Cap',
+                y='Volatility',
+                size='Volume',
+                color='24h Change',
+                hover_name='Asset',
+                log_x=True,
+                title=CONSTANTS['asset_risk_profile']['dashboard']['title']
+            )
+            
+            fig.update_layout(
+                xaxis_title="Market Cap (USD, log scale)",
+                yaxis_title="Volatility (%)",
+                coloraxis_colorbar_title="24h Change (%)"
+            )
+            return fig
         
-        fig.update_layout(
-            xaxis_title="Market Cap (USD, log scale)",
-            yaxis_title="Volatility (%)",
-            coloraxis_colorbar_title="24h Change (%)"
+        return memo_figure(
+            self.figure_cache,
+            'asset_risk_profile',
+            [df[column].to_numpy() for column in df.columns],
+            CONSTANTS['asset_risk_profile'],
+            build
         )
-        
-        return fig
     
     def create_top_asset_performance(self, top_n=5):
         """viz multi-asset price movement"""
         # Get top N assets
-        assets = self.api.get_assets(limit=top_n)
+        assets = self.get_assets(limit=top_n)
         lookback_d = CONSTANTS['top_asset_performance']['calcs']['lookback_d']
         interval_h = CONSTANTS['top_asset_performance']['calcs']['interval']
         
         # Get historical data for each asset
-        fig = go.Figure()
+        matrix = self.get_price_matrix(
+            [asset['id'] for asset in assets],
+            interval=interval_h,
+            lookback_d=lookback_d
+        )
+        names = {asset['id']: asset['name'] for asset in assets}
+        labels = [names[asset_id] for asset_id in matrix.columns]
+        timestamps = matrix.index.to_numpy()
+        prices = matrix.to_numpy()
         
-        for asset in assets:
-            history = self.api.get_asset_history(
-                asset['id'],
-                interval=interval_h,
-                start=int((datetime.now() - timedelta(days=lookback_d)).timestamp() * 1000)
-            )
+        # articles mentioning any of the assets per interval, when a news index has been built
+        news = np.zeros(len(timestamps), dtype=np.int64)
+        if self.news_index is not None:
+            news = self.news_index.volume(list(matrix.columns), timestamps, INTERVAL_MS[interval_h]).sum(axis=1)
+        
+        def build():
+            fig = go.Figure()
             
-            prices = [float(d['priceUsd']) for d in history]
-            timestamps = [datetime.fromtimestamp(int(d['time'])/1000) for d in history]
+            if news.any():
+                fig.add_trace(go.Bar(
+                    x=timestamps,
+                    y=news,
+                    name='News mentions',
+                    yaxis='y2',
+                    marker_color='lightgray',
+                    opacity=0.5,
+                    hovertemplate="Mentions: %{y}<extra></extra>"
+                ))
+                fig.update_layout(yaxis2=dict(title='News Mentions', overlaying='y', side='right', showgrid=False))
             
             # Normalize prices to percentage change from start
-            base_price = prices[0]
-            normalized_prices = [(p - base_price) / base_price * 100 for p in prices]
+            normalized = normalize_matrix(prices)
             
-            fig.add_trace(go.Scatter(
-                x=timestamps,
-                y=normalized_prices,
-                name=asset['name'],
-                hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Change: %{y:.2f}%<br>" +
-                "<extra></extra>"
-            ))
-        
-        fig.update_layout(
-            title=CONSTANTS['top_asset_performance']['dashboard']['title'],
-            xaxis_title='Date',
-            yaxis_title='Price Change (%)',
-            hovermode='x unified'
-        )
+            for j, label in enumerate(labels):
+                # keep the trace within the chart point budget whatever the source interval
+                x, y = downsample(timestamps, normalized[:, j])
+                
+                fig.add_trace(go.Scatter(
+                    x=x,
+                    y=y,
+                    name=label,
+                    hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Change: %{y:.2f}%<br>" +
+                    "<extra></extra>"
+                ))
+            
+            fig.update_layout(
+                title=CONSTANTS['top_asset_performance']['dashboard']['title'],
+                xaxis_title='Date',
+                yaxis_title='Price Change (%)',
+                hovermode='x unified'
+            )
+            return fig
         
-        return fig
+        return memo_figure(
+            self.figure_cache,
+            'top_asset_performance',
+            [timestamps, prices, labels, news],
+            CONSTANTS['top_asset_performance'],
+            build
+        )
     
-    def create_price_correlation_matrix(self, top_n=10):
-        """Create price correlation matrix for top assets"""
-        assets = self.api.get_assets(limit=top_n)
+    def create_price_correlation_matrix(self, top_n=10, cluster=True):
+        """Create log-return correlation matrix for top assets, ordered so correlated assets sit together"""
+        assets = self.get_assets(limit=top_n)
         lookback_d = CONSTANTS['price_correlation_matrix']['calcs']['lookback_d']
         interval_h = CONSTANTS['price_correlation_matrix']['calcs']['interval']
-        price_data = {}
         
-        # Collect historical prices for each asset
-        for asset in assets:
-            history = self.api.get_asset_history(
-                asset['id'],
-                interval=interval_h,
-                start=int((datetime.now() - timedelta(days=lookback_d)).timestamp() * 1000)
-            )
-            prices = [float(d['priceUsd']) for d in history]
-            price_data[asset['name']] = prices
-        
-        # Create correlation matrix
-        df = pd.DataFrame(price_data)
-        corr_matrix = df.corr()
-        
-        # Create heatmap
-        fig = px.imshow(
-            corr_matrix,
-            title=CONSTANTS['price_correlation_matrix']['dashboard']['title'],
-            color_continuous_scale='RdBu',
-            aspect='auto'
+        # Collect time-aligned historical prices for each asset
+        matrix = self.get_price_matrix(
+            [asset['id'] for asset in assets],
+            interval=interval_h,
+            lookback_d=lookback_d
         )
+        names = {asset['id']: asset['name'] for asset in assets}
+        labels = [names[asset_id] for asset_id in matrix.columns]
+        
+        prices = matrix.to_numpy()
+        
+        def build():
+            # Create correlation matrix of log returns
+            corr = correlation_matrix(prices)
+            order = cluster_order(corr) if cluster else np.arange(len(labels))
+            corr_matrix = pd.DataFrame(
+                corr[np.ix_(order, order)],
+                index=[labels[i] for i in order],
+                columns=[labels[i] for i in order]
+            )
+            
+            # Create heatmap
+            return px.imshow(
+                corr_matrix,
+                title=CONSTANTS['price_correlation_matrix']['dashboard']['title'],
+                color_continuous_scale='RdBu',
+                zmin=-1,
+                zmax=1,
+                aspect='auto'
+            )
         
-        return fig
+        return memo_figure(
+            self.figure_cache,
+            'price_correlation_matrix',
+            [prices, labels],
+            dict(CONSTANTS['price_correlation_matrix'], cluster=cluster),
+            build
+        )
     
     def create_asset_group_performance(self):
         """Create performance comparison by asset groups"""
-        # Define asset groups (you could make this dynamic/configurable)
-        groups = {
-            'Meme Coins': ['dogecoin', 'shiba-inu'],
-            'DeFi': ['uniswap', 'aave', 'maker'],
-            'Layer 1': ['bitcoin', 'ethereum', 'solana'],
-            'Exchange Tokens': ['binance-coin', 'ftx-token']
-        }
+        groups = CONSTANTS['asset_group_performance']['calcs']['groups']
         lookback_d = CONSTANTS['asset_group_performance']['calcs']['lookback_d']
         interval_h = CONSTANTS['asset_group_performance']['calcs']['interval']
-        fig = go.Figure()
-        
-        for group_name, assets in groups.items():
-            performances = []
-            for asset_id in assets:
-                try:
-                    history = self.api.get_asset_history(
-                        asset_id,
-                        interval=interval_h,
-                        start=int((datetime.now() - timedelta(days=lookback_d)).timestamp() * 1000)
-                    )
-                    
-                    prices = [float(d['priceUsd']) for d in history]
-                    perf = [(p - prices[0]) / prices[0] * 100 for p in prices]
-                    performances.append(perf)
-                except:
-                    continue
-            
-            if performances:
-                # Average performance for the group
-                avg_perf = np.mean(performances, axis=0)
-                timestamps = [datetime.fromtimestamp(int(d['time'])/1000) for d in history]
-                
-                fig.add_trace(go.Scatter(
-                    x=timestamps,
-                    y=avg_perf,
-                    name=group_name,
-                    hovertemplate=
-                    "<b>%{x}</b><br>" +
-                    "Change: %{y:.2f}%<br>" +
-                    "<extra></extra>"
-                ))
         
-        fig.update_layout(
-            title=CONSTANTS['asset_group_performance']['dashboard']['title'],
-            xaxis_title='Date',
-            yaxis_title='Average Price Change (%)',
-            hovermode='x unified'
+        matrix = self.get_price_matrix(
+            [asset_id for assets in groups.values() for asset_id in assets],
+            interval=interval_h,
+            lookback_d=lookback_d
         )
+        asset_ids = list(matrix.columns)
+        timestamps = matrix.index.to_numpy()
+        prices = matrix.to_numpy()
+        
+        def build():
+            fig = go.Figure()
+            normalized = normalize_matrix(prices)
+            
+            for group_name, assets in groups.items():
+                columns = [asset_ids.index(asset_id) for asset_id in assets if asset_id in asset_ids]
+                
+                if columns:
+                    # Average performance for the group, skipping assets not listed yet at a given time
+                    group = normalized[:, columns]
+                    counts = (~np.isnan(group)).sum(axis=1)
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        avg_perf = np.nansum(group, axis=1) / counts
+                    
+                    x, y = downsample(timestamps, avg_perf)
+                    
+                    fig.add_trace(go.Scatter(
+                        x=x,
+                        y=y,
+                        name=group_name,
+                        hovertemplate=
+                        "<b>%{x}</b><br>" +
+                        "Change: %{y:.2f}%<br>" +
+                        "<extra></extra>"
+                    ))
+            
+            fig.update_layout(
+                title=CONSTANTS['asset_group_performance']['dashboard']['title'],
+                xaxis_title='Date',
+                yaxis_title='Average Price Change (%)',
+                hovermode='x unified'
+            )
+            return fig
         
-        return fig
\ No newline at end of file
+        return memo_figure(
+            self.figure_cache,
+            'asset_group_performance',
+            [timestamps, prices, asset_ids],
+            CONSTANTS['asset_group_performance'],
+            build
+        )
\ No newline at end of file
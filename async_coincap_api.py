@@ -0,0 +1,160 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+import aiohttp
+from coincap_api import CoinCapAPIError, RETRY_STATUSES, history_window
+from rate_limiter import default_scheduler, BACKGROUND
+
+
+class AsyncCoinCapAPI:
+    """Coroutine version of CoinCapAPI on one pooled aiohttp session
+    
+    Use as an async context manager so the session is closed:
+    
+        async with AsyncCoinCapAPI() as api:
+            histories = await api.get_asset_histories(ids, interval="h1")
+    
+    Requests take tokens from the same process-wide scheduler as CoinCapAPI,
+    at background priority by default, so batch jobs cannot starve the pages.
+    """
+    
+    def __init__(self, base_url="https://api.coincap.io/v2", concurrency=32, pool_size=None,
+                 timeout=15, max_retries=3, backoff_base=0.5, backoff_max=20,
+                 cache=None, scheduler=None, priority=BACKGROUND):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.pool_size = pool_size or concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # optional api_cache.ResponseCache, may be shared with CoinCapAPI instances
+        self.cache = cache
+        # scheduler=False disables rate limiting, e.g. against a local stub server
+        self.scheduler = default_scheduler() if scheduler is None else scheduler
+        self.priority = priority
+        self._session = None
+        self._semaphore = None
+    
+    async def __aenter__(self):
+        await self.open()
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+    
+    async def open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+    
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _retry_delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+    
+    async def _request(self, url, params=None):
+        """GET url, retrying 429/5xx and connection errors; returns (payload, size in bytes)"""
+        await self.open()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            if self.scheduler:
+                await self.scheduler.acquire_async(self.priority)
+            try:
+                async with self._semaphore:
+                    async with self._session.get(url, params=params) as response:
+                        if response.status == 200:
+                            body = await response.read()
+                            return await response.json(content_type=None), len(body)
+                        if response.status not in RETRY_STATUSES or attempt == self.max_retries:
+                            raise CoinCapAPIError(f"GET {url} failed with status {response.status}")
+                        retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise CoinCapAPIError(f"GET {url} failed: {e}") from e
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+    
+    async def _get(self, path, params=None, cache_name=None):
+        """GET base_url + path and return the response's data payload"""
+        params = params or {}
+        key = None
+        if self.cache is not None and cache_name:
+            key = (self.base_url, path, tuple(sorted(params.items())))
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        payload, size = await self._request(f"{self.base_url}{path}", params=params)
+        if "data" not in payload:
+            raise CoinCapAPIError(f"GET {path} returned no data: {payload.get('error', payload)}")
+        data = payload["data"]
+        
+        if key is not None:
+            self.cache.set(key, data, size, self.cache.ttl_for(cache_name, params))
+        return data
+    
+    async def get_assets(self, limit=100, offset=0):
+        """Get information about all cryptocurrencies"""
+        params = {"limit": limit}
+        if offset:
+            params["offset"] = offset
+        return await self._get("/assets", params=params, cache_name="assets")
+    
+    async def get_asset_history(self, asset_id, interval="d1", start=None, end=None):
+        """Get historical data for a specific asset
+        Intervals: m1, m5, m15, m30, h1, h2, h6, h12, d1
+        """
+        start, end = history_window(interval, start, end)
+        
+        params = {
+            "interval": interval,
+            "start": start,
+            "end": end
+        }
+        return await self._get(f"/assets/{asset_id}/history", params=params, cache_name="history")
+    
+    async def get_asset_histories(self, asset_ids, interval="d1", start=None, end=None):
+        """Get historical data for many assets at once
+        Returns a dict keyed by asset id; assets whose request failed are left out
+        """
+        asset_ids = list(dict.fromkeys(asset_ids))
+        if not start:
+            start = int((datetime.now() - timedelta(days=30)).timestamp() * 1000)
+        if not end:
+            end = int(datetime.now().timestamp() * 1000)
+        
+        results = await asyncio.gather(
+            *(self.get_asset_history(asset_id, interval=interval, start=start, end=end) for asset_id in asset_ids),
+            return_exceptions=True
+        )
+        return {asset_id: history for asset_id, history in zip(asset_ids, results)
+                if not isinstance(history, BaseException)}
+    
+    async def get_markets(self, asset_id=None, limit=100, offset=0):
+        """Get market data for all markets or a specific asset"""
+        params = {"limit": limit}
+        if offset:
+            params["offset"] = offset
+        if asset_id:
+            params["baseId"] = asset_id
+        return await self._get("/markets", params=params, cache_name="markets")
+    
+    async def get_exchanges(self, limit=100, offset=0):
+        """Get information about exchanges"""
+        params = {"limit": limit}
+        if offset:
+            params["offset"] = offset
+        return await self._get("/exchanges", params=params, cache_name="exchanges")
+    
+    async def get_rates(self):
+        """Get exchange rates for all supported fiat currencies"""
+        return await self._get("/rates", cache_name="rates")
@@ -1,53 +1,212 @@
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta  # Add this line
+import logging
+import random
+import time
 import sys
+from rate_limiter import default_scheduler, INTERACTIVE
+from api_cache import INTERVAL_MS
 sys.path.append('..')
 
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def history_window(interval, start=None, end=None):
+    """(start, end) in ms of a history request, the last 30 days by default
+    
+    The window is aligned to whole candles, so repeated calls share a cache key
+    instead of one per millisecond.
+    """
+    if not start:
+        start = int((datetime.now() - timedelta(days=30)).timestamp() * 1000)
+    if not end:
+        end = int(datetime.now().timestamp() * 1000)
+    step = INTERVAL_MS.get(interval)
+    if step:
+        start = start // step * step
+        end = -(-end // step) * step
+    return start, end
+
+class CoinCapAPIError(Exception):
+    """Raised when CoinCap keeps failing after all retries"""
+
 class CoinCapAPI:
-    def __init__(self, base_url="https://api.coincap.io/v2"):
+    def __init__(self, base_url="https://api.coincap.io/v2", max_workers=8, cache=None,
+                 pool_size=None, timeout=(3.05, 15), max_retries=3, backoff_base=0.5, backoff_max=20,
+                 scheduler=None, priority=INTERACTIVE):
         self.base_url = base_url
+        self.max_workers = max_workers
+        # optional api_cache.ResponseCache, may be shared between instances
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # every attempt takes a token from the process-wide rate limit; background jobs yield to pages
+        self.scheduler = scheduler or default_scheduler()
+        self.priority = priority
+        
+        # keep-alive pool sized so concurrent history fetches never wait on a connection
+        pool_size = pool_size or max(10, max_workers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def close(self):
+        self.session.close()
+    
+    def _retry_delay(self, attempt, response=None):
+        """seconds to wait before the next attempt: Retry-After if given, else full-jitter backoff"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+    
+    def _request(self, url, params=None):
+        """GET url on the pooled session, retrying 429/5xx and connection errors"""
+        for attempt in range(self.max_retries + 1):
+            response = None
+            self.scheduler.acquire(self.priority)
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise CoinCapAPIError(f"GET {url} failed: {e}") from e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                if attempt == self.max_retries:
+                    raise CoinCapAPIError(f"GET {url} failed with status {response.status_code}")
+            time.sleep(self._retry_delay(attempt, response))
         
-    def get_assets(self, limit=100):
+        if response.status_code != 200:
+            raise CoinCapAPIError(f"GET {url} failed with status {response.status_code}")
+        return response
+    
+    def _get(self, path, params=None, cache_name=None):
+        """GET base_url + path and return the response's data payload"""
+        key = None
+        if self.cache is not None and cache_name:
+            key = (self.base_url, path, tuple(sorted((params or {}).items())))
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        def fetch():
+            response = self._request(f"{self.base_url}{path}", params=params)
+            payload = response.json()
+            if "data" not in payload:
+                raise CoinCapAPIError(f"GET {path} returned no data: {payload.get('error', payload)}")
+            return payload["data"], len(response.content)
+        
+        # identical requests already in flight (e.g. from another session) share one response
+        flight_key = (self.base_url, path, tuple(sorted((params or {}).items())))
+        data, size = self.scheduler.single_flight(flight_key, fetch)
+        
+        if key is not None:
+            self.cache.set(key, data, size, self.cache.ttl_for(cache_name, params))
+        return data
+    
+    def iter_pages(self, path, params=None, page_size=2000, parallel=1):
+        """Yield every row of a list endpoint, paging with offset
+        Fetches `parallel` pages at a time and stops at the first short page;
+        only those pages are held in memory
+        """
+        params = dict(params or {})
+        offset = 0
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+            while True:
+                offsets = [offset + i * page_size for i in range(max(1, parallel))]
+                pages = pool.map(lambda o: self._get(path, params=dict(params, limit=page_size, offset=o)), offsets)
+                for page in pages:
+                    yield from page
+                    if len(page) < page_size:
+                        return
+                offset = offsets[-1] + page_size
+    
+    def get_assets(self, limit=100, offset=0):
         """Get information about all cryptocurrencies"""
-        endpoint = f"{self.base_url}/assets"
-        response = requests.get(endpoint, params={"limit": limit})
-        return response.json()["data"]
+        params = {"limit": limit}
+        if offset:
+            params["offset"] = offset
+        return self._get("/assets", params=params, cache_name="assets")
+    
+    def iter_assets(self, page_size=2000, parallel=1):
+        """Iterate over every asset"""
+        return self.iter_pages("/assets", page_size=page_size, parallel=parallel)
     
     def get_asset_history(self, asset_id, interval="d1", start=None, end=None):
         """Get historical data for a specific asset
         Intervals: m1, m5, m15, m30, h1, h2, h6, h12, d1
         """
-        if not start:
-            start = int((datetime.now() - timedelta(days=30)).timestamp() * 1000)
-        if not end:
-            end = int(datetime.now().timestamp() * 1000)
-            
-        endpoint = f"{self.base_url}/assets/{asset_id}/history"
+        start, end = history_window(interval, start, end)
+        
         params = {
             "interval": interval,
             "start": start,
             "end": end
         }
-        response = requests.get(endpoint, params=params)
-        return response.json()["data"]
+        return self._get(f"/assets/{asset_id}/history", params=params, cache_name="history")
     
-    def get_markets(self, asset_id=None, limit=100):
+    def get_asset_histories(self, asset_ids, interval="d1", start=None, end=None):
+        """Get historical data for several assets concurrently
+        Returns a dict keyed by asset id; assets whose request failed are left out
+        """
+        asset_ids = list(dict.fromkeys(asset_ids))
+        if not asset_ids:
+            return {}
+        # pin the window so every asset covers the same span
+        if not start:
+            start = int((datetime.now() - timedelta(days=30)).timestamp() * 1000)
+        if not end:
+            end = int(datetime.now().timestamp() * 1000)
+        
+        def fetch(asset_id):
+            try:
+                return self.get_asset_history(asset_id, interval=interval, start=start, end=end)
+            except Exception as e:
+                logger.warning(f"{interval} history for {asset_id} failed, leaving it out: {e}")
+                return None
+        
+        workers = max(1, min(self.max_workers, len(asset_ids)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fetch, asset_ids))
+        
+        return {asset_id: history for asset_id, history in zip(asset_ids, results) if history is not None}
+    
+    def get_markets(self, asset_id=None, limit=100, offset=0):
         """Get market data for all markets or a specific asset"""
-        endpoint = f"{self.base_url}/markets"
         params = {"limit": limit}
+        if offset:
+            params["offset"] = offset
         if asset_id:
             params["baseId"] = asset_id
-        response = requests.get(endpoint, params=params)
-        return response.json()["data"]
+        return self._get("/markets", params=params, cache_name="markets")
+    
+    def iter_markets(self, asset_id=None, page_size=2000, parallel=1):
+        """Iterate over every market, or every market of one asset"""
+        params = {"baseId": asset_id} if asset_id else None
+        return self.iter_pages("/markets", params=params, page_size=page_size, parallel=parallel)
     
-    def get_exchanges(self, limit=100):
+    def get_exchanges(self, limit=100, offset=0):
         """Get information about exchanges"""
-        endpoint = f"{self.base_url}/exchanges"
-        response = requests.get(endpoint, params={"limit": limit})
-        return response.json()["data"]
+        params = {"limit": limit}
+        if offset:
+            params["offset"] = offset
+        return self._get("/exchanges", params=params, cache_name="exchanges")
+    
+    def iter_exchanges(self, page_size=2000, parallel=1):
+        """Iterate over every exchange"""
+        return self.iter_pages("/exchanges", page_size=page_size, parallel=parallel)
     
     def get_rates(self):
         """Get exchange rates for all supported fiat currencies"""
-        endpoint = f"{self.base_url}/rates"
-        response = requests.get(endpoint)
-        return response.json()["data"]
\ No newline at end of file
+        return self._get("/rates", cache_name="rates")
\ No newline at end of file
@@ -50,10 +50,24 @@ CONSTANTS = {
     "asset_group_performance": {
         "calcs": {
             "lookback_d": 7,
-            "interval": "h1"
+            "interval": "h1",
+            "groups": {
+                "Meme Coins": ["dogecoin", "shiba-inu"],
+                "DeFi": ["uniswap", "aave", "maker"],
+                "Layer 1": ["bitcoin", "ethereum", "solana"],
+                "Exchange Tokens": ["binance-coin", "ftx-token"]
+            }
         },
         "dashboard": {
             "title": "🐸 Asset Group Performance Comparison"
         }
+    },
+    "refresher": {
+        "calcs": {
+            "interval_s": 60,
+            "assets_limit": 100,
+            "history_top_n": 20,
+            "max_age_d": 90
+        }
     }
 }
\ No newline at end of file
@@ -0,0 +1,120 @@
+import numpy as np
+
+
+def log_returns(prices):
+    """(T x N) prices -> (T-1 x N) log returns, NaN wherever either price is missing"""
+    prices = np.asarray(prices, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(np.log(prices), axis=0)
+
+
+def _centered(returns):
+    """returns minus each column's mean over its valid rows, 0 where missing, plus the validity mask
+    
+    Centering does not change a correlation, it keeps the sums of squares below well conditioned.
+    """
+    valid = ~np.isnan(returns)
+    filled = np.where(valid, returns, 0.0)
+    means = filled.sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    return np.where(valid, filled - means, 0.0), valid.astype(np.float64)
+
+
+def correlation_matrix(prices, block_size=128, min_periods=3):
+    """correlation of log returns for every pair of columns in a (T x N) price matrix
+    
+    Pairwise complete: each pair is correlated over the rows where both assets
+    have a return, so a recent listing is compared with the others over its own
+    history only. Counts, sums and sums of squares over those rows come from
+    products of the validity masks with the returns, filled block by block so the
+    intermediate products stay bounded at block_size x block_size. Pairs sharing
+    fewer than min_periods returns are NaN.
+    """
+    x, valid = _centered(log_returns(prices))
+    x2 = x * x
+    n = x.shape[1]
+    corr = np.empty((n, n), dtype=np.float64)
+    for i in range(0, n, block_size):
+        xi, x2i, vi = x[:, i:i + block_size], x2[:, i:i + block_size], valid[:, i:i + block_size]
+        for j in range(i, n, block_size):
+            xj, x2j, vj = x[:, j:j + block_size], x2[:, j:j + block_size], valid[:, j:j + block_size]
+            count = vi.T @ vj
+            sum_i, sum_j = xi.T @ vj, vi.T @ xj
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cov = xi.T @ xj - sum_i * sum_j / count
+                var_i = x2i.T @ vj - sum_i * sum_i / count
+                var_j = vi.T @ x2j - sum_j * sum_j / count
+                block = cov / np.sqrt(var_i * var_j)
+            block[(count < min_periods) | ~(var_i > 0) | ~(var_j > 0)] = np.nan
+            corr[i:i + block_size, j:j + block_size] = block
+            corr[j:j + block_size, i:i + block_size] = block.T
+    np.clip(corr, -1.0, 1.0, out=corr)
+    usable = ~np.isnan(np.diagonal(corr))
+    np.fill_diagonal(corr, np.where(usable, 1.0, np.nan))
+    return corr
+
+
+def rolling_correlation(prices, window, pairs=None):
+    """rolling log-return correlation over `window` returns for the given (i, j) column pairs
+    
+    Returns a (T-1 x len(pairs)) array, NaN until a window is full or while it
+    contains a missing return. Windowed sums come from cumulative sums, so the
+    cost is O(T) per pair regardless of the window length.
+    """
+    returns = log_returns(prices)
+    n = returns.shape[1]
+    if pairs is None:
+        pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    x = returns[:, pairs[:, 0]]
+    y = returns[:, pairs[:, 1]]
+    
+    def window_sum(values):
+        csum = np.cumsum(np.nan_to_num(values), axis=0)
+        out = np.full(values.shape, np.nan)
+        if values.shape[0] >= window:
+            out[window - 1:] = csum[window - 1:]
+            out[window:] -= csum[:-window]
+        return out
+    
+    missing = window_sum((np.isnan(x) | np.isnan(y)).astype(np.float64))
+    sx, sy = window_sum(x), window_sum(y)
+    sxx, syy, sxy = window_sum(x * x), window_sum(y * y), window_sum(x * y)
+    cov = sxy - sx * sy / window
+    var_x = sxx - sx * sx / window
+    var_y = syy - sy * sy / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[missing > 0] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def top_pairs(corr, k=10, most=True):
+    """the k most (or least) correlated distinct pairs as a list of (i, j, corr)"""
+    rows, cols = np.triu_indices(corr.shape[0], k=1)
+    values = corr[rows, cols]
+    keep = ~np.isnan(values)
+    rows, cols, values = rows[keep], cols[keep], values[keep]
+    if values.size == 0:
+        return []
+    k = min(k, values.size)
+    scores = -values if most else values
+    picked = np.argpartition(scores, k - 1)[:k]
+    picked = picked[np.argsort(scores[picked])]
+    return [(int(rows[p]), int(cols[p]), float(values[p])) for p in picked]
+
+
+def cluster_order(corr):
+    """column order that places correlated assets next to each other
+    
+    Spectral seriation: assets are sorted by the Fiedler vector of the graph whose
+    edge weights are the (non-negative) correlations, which is a single dense
+    eigendecomposition rather than a full hierarchical clustering.
+    """
+    n = corr.shape[0]
+    if n < 3:
+        return np.arange(n)
+    weights = np.nan_to_num(np.clip(corr, 0.0, None))
+    np.fill_diagonal(weights, 0.0)
+    laplacian = np.diag(weights.sum(axis=1)) - weights
+    _, vectors = np.linalg.eigh(laplacian)
+    return np.argsort(vectors[:, 1], kind='stable')
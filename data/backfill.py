@@ -0,0 +1,132 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+# run as a script from anywhere, the modules below live in the main directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api_cache import HISTORY_SPAN_MS
+from coincap_api import CoinCapAPI
+from history_store import HistoryStore
+from local_store import history_dir
+from rate_limiter import BACKGROUND
+
+#python data/backfill.py --assets bitcoin,ethereum --interval m5 --days 90
+#COINCAP_API_MODE=store COINCAP_STORE_DIR=crypto_data/backfill streamlit run market_summary.py
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# not the refresher's store: both rewrite whole series files from their own copy in memory,
+# and the refresher prunes candles older than its max_age_d
+DEFAULT_BACKFILL_DIR = os.path.join("crypto_data", "backfill")
+
+# one chunk is the longest span CoinCap returns in full for one history request
+CHUNK_MS = HISTORY_SPAN_MS
+
+def plan_chunks(start, end, interval):
+    """split [start, end] into chunks aligned to the chunk grid so reruns produce the same chunks"""
+    size = CHUNK_MS[interval]
+    chunks = []
+    chunk_start = start // size * size
+    while chunk_start < end:
+        chunks.append((max(chunk_start, start), min(chunk_start + size, end)))
+        chunk_start += size
+    return chunks
+
+class Checkpoint:
+    """set of finished chunk keys persisted as JSON after every chunk"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = set(json.load(f))
+    
+    def __contains__(self, key):
+        return key in self.done
+    
+    def add(self, key):
+        with self._lock:
+            self.done.add(key)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(sorted(self.done), f)
+            os.replace(tmp, self.path)
+
+def chunk_key(asset_id, interval, chunk_start, chunk_end):
+    return f"{asset_id}|{interval}|{chunk_start}|{chunk_end}"
+
+def backfill(asset_ids, interval="m5", days=90, store_dir=DEFAULT_BACKFILL_DIR, checkpoint_path=None, max_workers=8):
+    """download [now - days, now] for every asset in chunks, resuming from the checkpoint"""
+    api = CoinCapAPI(max_workers=max_workers, priority=BACKGROUND)
+    store = HistoryStore(api, path=history_dir(store_dir))
+    checkpoint = Checkpoint(checkpoint_path or os.path.join(store_dir, f"backfill_{interval}.json"))
+    
+    end = int(datetime.now().timestamp() * 1000)
+    start = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
+    chunk_size = CHUNK_MS[interval]
+    
+    jobs = []
+    for asset_id in asset_ids:
+        for chunk_start, chunk_end in plan_chunks(start, end, interval):
+            # keyed by the span actually downloaded, a first chunk that starts mid-grid must not
+            # mark the whole grid cell done for a later run reaching further back
+            key = chunk_key(asset_id, interval, chunk_start, chunk_end)
+            if key not in checkpoint:
+                jobs.append((asset_id, chunk_start, chunk_end, key))
+    logger.info(f"{len(jobs)} chunks to download, {len(checkpoint.done)} already done")
+    
+    def download(asset_id, chunk_start, chunk_end, key):
+        candles = api.get_asset_history(asset_id, interval=interval, start=chunk_start, end=chunk_end)
+        store.put(asset_id, interval, candles)
+        # the chunk still growing at the head is re-downloaded on the next run
+        if chunk_end % chunk_size == 0:
+            checkpoint.add(key)
+        return len(candles)
+    
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(download, *job): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            asset_id, chunk_start, _, _ = futures[future]
+            try:
+                count = future.result()
+                logger.info(f"[{done}/{len(jobs)}] {asset_id} {datetime.fromtimestamp(chunk_start / 1000):%Y-%m-%d}: {count} candles")
+            except Exception as e:
+                failed += 1
+                logger.error(f"[{done}/{len(jobs)}] {asset_id} {datetime.fromtimestamp(chunk_start / 1000):%Y-%m-%d} failed: {e}")
+    
+    if failed:
+        logger.error(f"{failed} chunks failed, run again to resume")
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--assets', help='Comma separated asset ids (default: top N by market cap)')
+    parser.add_argument('--top_n', type=int, default=20, help='Backfill the top N assets when --assets is not given')
+    parser.add_argument('--interval', default='m5', choices=sorted(CHUNK_MS), help='Candle interval')
+    parser.add_argument('--days', type=int, default=90, help='How far back to backfill')
+    parser.add_argument('--store_dir', default=DEFAULT_BACKFILL_DIR, help='Directory of the backfilled history store')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <store_dir>/backfill_<interval>.json)')
+    parser.add_argument('--max_workers', type=int, default=8, help='Concurrent chunk downloads')
+    args = parser.parse_args()
+    
+    if args.assets:
+        asset_ids = [asset_id.strip() for asset_id in args.assets.split(',') if asset_id.strip()]
+    else:
+        asset_ids = [asset['id'] for asset in CoinCapAPI().get_assets(limit=args.top_n)]
+    
+    backfill(
+        asset_ids,
+        interval=args.interval,
+        days=args.days,
+        store_dir=args.store_dir,
+        checkpoint_path=args.checkpoint,
+        max_workers=args.max_workers
+    )
@@ -1,7 +1,11 @@
 import os
-import pandas as pd
+import glob
+import sys
 from datetime import datetime
+# run as a script from anywhere, the modules below live in the main directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from coincap_api import CoinCapAPI  # Save the previous code as coincap_api.py
+from snapshots import SCHEMAS, DEFAULT_ROOT, write_snapshot, write_snapshot_stream, read_snapshot, import_csv
 
 def setup_data_directory():
     """Create directory structure for crypto data"""
@@ -16,47 +20,55 @@ def setup_data_directory():
     
     return raw_dir
 
-def fetch_and_save_preview_data():
-    """Fetch 1000 rows of data from each endpoint and save to CSVs"""
+def fetch_and_save_preview_data(snapshot_root=None, parallel_pages=4):
+    """Fetch every row of each endpoint and save typed Parquet snapshots"""
     api = CoinCapAPI()
-    raw_dir = setup_data_directory()
+    snapshot_root = snapshot_root or DEFAULT_ROOT
     timestamp = datetime.now().strftime("%Y%m%d")
     
-    # Fetch and save assets data
-    assets = api.get_assets(limit=1000)
-    assets_df = pd.DataFrame(assets)
-    assets_df.to_csv(os.path.join(raw_dir, f'assets_{timestamp}.csv'), index=False)
-    
-    # Fetch and save markets data
-    markets = api.get_markets(limit=1000)
-    markets_df = pd.DataFrame(markets)
-    markets_df.to_csv(os.path.join(raw_dir, f'markets_{timestamp}.csv'), index=False)
-    
-    # Fetch and save exchanges data
-    exchanges = api.get_exchanges(limit=1000)
-    exchanges_df = pd.DataFrame(exchanges)
-    exchanges_df.to_csv(os.path.join(raw_dir, f'exchanges_{timestamp}.csv'), index=False)
+    # Stream every page of assets, markets and exchanges straight into the snapshots
+    for endpoint, rows in [
+        ('assets', api.iter_assets(parallel=parallel_pages)),
+        ('markets', api.iter_markets(parallel=parallel_pages)),
+        ('exchanges', api.iter_exchanges(parallel=parallel_pages))
+    ]:
+        _, count = write_snapshot_stream(rows, endpoint, timestamp, root=snapshot_root)
+        print(f"Saved {count} {endpoint}")
     
     # Fetch and save rates data
     rates = api.get_rates()
-    rates_df = pd.DataFrame(rates)
-    rates_df.to_csv(os.path.join(raw_dir, f'rates_{timestamp}.csv'), index=False)
+    write_snapshot(rates, 'rates', timestamp, root=snapshot_root)
     
     # Fetch historical data for Bitcoin as an example
     btc_history = api.get_asset_history('bitcoin', interval='h1')
-    history_df = pd.DataFrame(btc_history)
-    history_df.to_csv(os.path.join(raw_dir, f'bitcoin_history_{timestamp}.csv'), index=False)
+    write_snapshot(btc_history, 'history', timestamp, root=snapshot_root, key='bitcoin_h1')
     
-    print(f"Data files saved in {raw_dir}/")
+    print(f"Snapshots saved in {snapshot_root}/")
     return {
-        'assets': assets_df,
-        'markets': markets_df,
-        'exchanges': exchanges_df,
-        'rates': rates_df,
-        'btc_history': history_df
+        'assets': read_snapshot('assets', timestamp, root=snapshot_root),
+        'markets': read_snapshot('markets', timestamp, root=snapshot_root),
+        'exchanges': read_snapshot('exchanges', timestamp, root=snapshot_root),
+        'rates': read_snapshot('rates', timestamp, root=snapshot_root),
+        'btc_history': read_snapshot('history', timestamp, root=snapshot_root, key='bitcoin_h1')
     }
 
+def import_raw_samples(raw_dir=os.path.join("data", "raw_samples"), snapshot_root=None):
+    """Convert the legacy CSV dumps into snapshots"""
+    snapshot_root = snapshot_root or DEFAULT_ROOT
+    for path in sorted(glob.glob(os.path.join(raw_dir, "*.csv"))):
+        name, date = os.path.splitext(os.path.basename(path))[0].rsplit("_", 1)
+        if name.endswith("_history"):
+            import_csv(path, 'history', date, root=snapshot_root, key=f"{name[:-len('_history')]}_h1")
+        elif name in SCHEMAS:
+            import_csv(path, name, date, root=snapshot_root)
+
 if __name__ == "__main__":
+    # python data/setup_data.py --import_samples converts data/raw_samples instead of fetching
+    if "--import_samples" in sys.argv:
+        import_raw_samples()
+        print(f"Snapshots saved in {DEFAULT_ROOT}/")
+        sys.exit()
+    
     dfs = fetch_and_save_preview_data()
     
     # Print preview of each dataset
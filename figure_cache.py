@@ -0,0 +1,31 @@
+import hashlib
+import json
+import numpy as np
+
+# figures are rebuilt at least this often even if their inputs never change
+FIGURE_TTL_S = 3600
+
+
+def content_hash(inputs, config=None):
+    """stable hash of a panel's input arrays plus its config"""
+    h = hashlib.blake2b(digest_size=16)
+    for value in inputs:
+        values = np.asarray(value)
+        if values.dtype == object:
+            h.update(json.dumps(values.tolist(), default=str).encode())
+        else:
+            h.update(f"{values.dtype}{values.shape}".encode())
+            h.update(np.ascontiguousarray(values).tobytes())
+    h.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def memo_figure(cache, panel, inputs, config, build):
+    """figure for these inputs from cache (an api_cache.ResponseCache), calling build() only on a miss"""
+    key = ("figure", panel, content_hash(inputs, config))
+    fig = cache.get(key)
+    if fig is None:
+        fig = build()
+        size = sum(np.asarray(value).nbytes for value in inputs)
+        cache.set(key, fig, size, FIGURE_TTL_S)
+    return fig
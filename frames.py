@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+
+def history_to_frame(history):
+    """CoinCap candles -> DataFrame with datetime64[ms] 'time' and float64 'priceUsd'
+    
+    Parsing happens in numpy's C loops rather than one float()/fromtimestamp() per row.
+    """
+    n = len(history)
+    times = np.fromiter((d['time'] for d in history), dtype=np.int64, count=n)
+    prices = np.array([d['priceUsd'] for d in history], dtype=np.float64)
+    return pd.DataFrame({
+        'time': times.astype('datetime64[ms]'),
+        'priceUsd': prices
+    })
+
+
+def build_price_matrix(frames, step_ms, start_ms, end_ms, fill='ffill'):
+    """align price frames on a common time grid as one (time x asset) float64 matrix
+    
+    Candles are snapped to the grid step; slots with no candle are forward-filled
+    from the previous price (fill='ffill') or left as NaN (fill=None). Slots before
+    an asset's first candle (e.g. a new listing) are always NaN.
+    """
+    grid_start = start_ms // step_ms * step_ms
+    n_rows = int((end_ms - grid_start) // step_ms) + 1
+    asset_ids = list(frames)
+    matrix = np.full((n_rows, len(asset_ids)), np.nan, dtype=np.float64)
+    
+    for j, asset_id in enumerate(asset_ids):
+        frame = frames[asset_id]
+        times = frame['time'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+        rows = (times - grid_start) // step_ms
+        inside = (rows >= 0) & (rows < n_rows)
+        # later candles win when two snap to the same slot
+        matrix[rows[inside], j] = frame['priceUsd'].to_numpy()[inside]
+    
+    if fill == 'ffill' and n_rows:
+        filled_row = np.where(~np.isnan(matrix), np.arange(n_rows)[:, None], 0)
+        np.maximum.accumulate(filled_row, axis=0, out=filled_row)
+        matrix = matrix[filled_row, np.arange(len(asset_ids))]
+    
+    grid = (grid_start + np.arange(n_rows, dtype=np.int64) * step_ms).astype('datetime64[ms]')
+    return pd.DataFrame(matrix, index=pd.Index(grid, name='time'), columns=asset_ids)
+
+
+def normalize_matrix(matrix):
+    """percentage change of every column from its first valid price"""
+    values = np.asarray(matrix, dtype=np.float64)
+    if values.size == 0:
+        return values
+    first_row = np.argmax(~np.isnan(values), axis=0)
+    base = values[first_row, np.arange(values.shape[1])]
+    return (values / base - 1.0) * 100
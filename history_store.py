@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from api_cache import INTERVAL_MS, HISTORY_SPAN_MS
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryStore:
+    """Local time-series store of CoinCap candles keyed by (asset_id, interval)
+    
+    Requests for a window only go to the api for the part that is not stored yet,
+    normally just the candles newer than the last one we have seen.
+    """
+    
+    def __init__(self, api, path=None, max_age_d=None):
+        self.api = api
+        # optional directory to persist series between processes
+        self.path = path
+        # drop candles older than this many days when merging
+        self.max_age_d = max_age_d
+        self._series = {}
+        # earliest start of a window fetched in full, the asset may list later than that
+        self._covered = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+    
+    def last_time(self, asset_id, interval):
+        """time of the newest stored candle, or None"""
+        series = self._load(asset_id, interval)
+        return series[-1]['time'] if series else None
+    
+    def get_asset_history(self, asset_id, interval="d1", start=None, end=None):
+        """same contract as CoinCapAPI.get_asset_history, served from the store"""
+        if not start:
+            start = int((datetime.now() - timedelta(days=30)).timestamp() * 1000)
+        if not end:
+            end = int(datetime.now().timestamp() * 1000)
+        
+        key = (asset_id, interval)
+        with self._key_lock(asset_id, interval):
+            series = self._load(asset_id, interval)
+            step = INTERVAL_MS.get(interval, 0)
+            covered = self._covered.get(key, series[0]['time'] if series else None)
+            fetched = []
+            
+            if not series or start < covered - step or series[-1]['time'] < start:
+                # nothing usable stored, take the whole window
+                fetched = self._fetch(asset_id, interval, start, end)
+                if series and (start > series[-1]['time'] + step or end < series[0]['time'] - step):
+                    # the window does not touch the stored series, merging would leave a hole between
+                    # them that later tail fetches never fill, so the window replaces it
+                    series = []
+                if fetched:
+                    covered = min(start, covered) if series else start
+            elif end - series[-1]['time'] >= step:
+                # re-request from the last stored candle so it is replaced if it was still open
+                fetched = self._fetch(asset_id, interval, series[-1]['time'], end)
+            
+            if fetched:
+                series = self._merge(asset_id, interval, series, fetched)
+                # pruning by max_age_d gives up the oldest part of the covered range
+                self._covered[key] = max(covered, series[0]['time']) if self.max_age_d else covered
+        
+        return [candle for candle in series if start <= candle['time'] <= end]
+    
+    def get_asset_histories(self, asset_ids, interval="d1", start=None, end=None):
+        """same contract as CoinCapAPI.get_asset_histories, only the missing tails are fetched"""
+        asset_ids = list(dict.fromkeys(asset_ids))
+        if not asset_ids:
+            return {}
+        if not start:
+            start = int((datetime.now() - timedelta(days=30)).timestamp() * 1000)
+        if not end:
+            end = int(datetime.now().timestamp() * 1000)
+        
+        def fetch(asset_id):
+            try:
+                return self.get_asset_history(asset_id, interval=interval, start=start, end=end)
+            except Exception as e:
+                logger.warning(f"{interval} history for {asset_id} failed, leaving it out: {e}")
+                return None
+        
+        workers = max(1, min(getattr(self.api, 'max_workers', 8), len(asset_ids)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fetch, asset_ids))
+        
+        return {asset_id: history for asset_id, history in zip(asset_ids, results) if history is not None}
+    
+    def put(self, asset_id, interval, candles):
+        """merge externally fetched candles (e.g. a backfill) into the store"""
+        with self._key_lock(asset_id, interval):
+            series = self._load(asset_id, interval)
+            return len(self._merge(asset_id, interval, series, candles))
+    
+    def _fetch(self, asset_id, interval, start, end):
+        """candles in [start, end], split into requests CoinCap serves in full (e.g. 5 days of m5)"""
+        span = HISTORY_SPAN_MS.get(interval)
+        if not span or end - start <= span:
+            return self.api.get_asset_history(asset_id, interval=interval, start=start, end=end)
+        candles = []
+        for chunk_start in range(start, end, span):
+            candles += self.api.get_asset_history(
+                asset_id, interval=interval, start=chunk_start, end=min(chunk_start + span, end)
+            )
+        return candles
+    
+    def _merge(self, asset_id, interval, series, candles):
+        by_time = {candle['time']: candle for candle in series}
+        for candle in candles:
+            candle = dict(candle, time=int(candle['time']))
+            by_time[candle['time']] = candle
+        merged = [by_time[t] for t in sorted(by_time)]
+        
+        if self.max_age_d and merged:
+            cutoff = merged[-1]['time'] - self.max_age_d * 24 * 3_600_000
+            merged = [candle for candle in merged if candle['time'] >= cutoff]
+        
+        self._series[(asset_id, interval)] = merged
+        self._save(asset_id, interval, merged)
+        return merged
+    
+    def _key_lock(self, asset_id, interval):
+        with self._lock:
+            return self._locks.setdefault((asset_id, interval), threading.Lock())
+    
+    def _file(self, asset_id, interval):
+        return os.path.join(self.path, f"{asset_id}_{interval}.json")
+    
+    def _load(self, asset_id, interval):
+        key = (asset_id, interval)
+        if key not in self._series:
+            series = []
+            if self.path and os.path.exists(self._file(asset_id, interval)):
+                with open(self._file(asset_id, interval)) as f:
+                    series = json.load(f)
+            self._series[key] = series
+        return self._series[key]
+    
+    def _save(self, asset_id, interval, series):
+        if not self.path:
+            return
+        tmp = self._file(asset_id, interval) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(series, f)
+        os.replace(tmp, self._file(asset_id, interval))
@@ -0,0 +1,164 @@
+import numpy as np
+
+DEFAULT_PARAMS = {
+    "rsi_window": 14,
+    "macd_fast": 12,
+    "macd_slow": 26,
+    "macd_signal": 9,
+    "bb_window": 20,
+    "bb_k": 2.0,
+    "roc_window": 12
+}
+
+
+class _Ring:
+    """fixed-size per-asset window of the last values, pushing returns the value that drops out"""
+    
+    def __init__(self, size, n_assets):
+        self.size = size
+        self.values = np.full((size, n_assets), np.nan)
+        self.pos = np.zeros(n_assets, dtype=np.int64)
+        self.count = np.zeros(n_assets, dtype=np.int64)
+        self._cols = np.arange(n_assets)
+    
+    def push(self, x, valid):
+        cols = self._cols[valid]
+        pos = self.pos[valid]
+        dropped = np.full(x.shape, np.nan)
+        full = self.count[valid] >= self.size
+        dropped[cols[full]] = self.values[pos[full], cols[full]]
+        self.values[pos, cols] = x[valid]
+        self.pos[valid] = (pos + 1) % self.size
+        self.count[valid] += 1
+        return dropped
+
+
+class _EMA:
+    """exponential moving average seeded with the first value (pandas ewm adjust=False)"""
+    
+    def __init__(self, span, n_assets):
+        self.alpha = 2.0 / (span + 1)
+        self.value = np.full(n_assets, np.nan)
+    
+    def update(self, x, valid):
+        seed = valid & np.isnan(self.value)
+        step = valid & ~seed
+        self.value[seed] = x[seed]
+        self.value[step] += self.alpha * (x[step] - self.value[step])
+        return self.value.copy()
+
+
+class IndicatorEngine:
+    """Momentum indicators for a batch of assets with O(1) work per new candle
+    
+    Every state is a vector over assets, so one update() folds a new price for
+    all assets at once and run() over a (time x asset) matrix is just repeated
+    updates. NaN prices (no candle for that asset yet) leave its state untouched.
+    
+    Indicators: RSI with Wilder smoothing, MACD (line, signal, histogram),
+    Bollinger bands with %B, and rate of change.
+    """
+    
+    OUTPUTS = ["rsi", "macd", "macd_signal", "macd_hist", "bb_mid", "bb_upper", "bb_lower", "bb_percent_b", "roc"]
+    
+    def __init__(self, n_assets, **params):
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"unknown indicator params: {', '.join(sorted(unknown))}")
+        self.params = dict(DEFAULT_PARAMS, **params)
+        self.n_assets = n_assets
+        
+        # rsi
+        self._prev = np.full(n_assets, np.nan)
+        self._deltas = np.zeros(n_assets, dtype=np.int64)
+        self._avg_gain = np.zeros(n_assets)
+        self._avg_loss = np.zeros(n_assets)
+        # macd
+        self._fast = _EMA(self.params["macd_fast"], n_assets)
+        self._slow = _EMA(self.params["macd_slow"], n_assets)
+        self._signal = _EMA(self.params["macd_signal"], n_assets)
+        # bollinger
+        self._bb_ring = _Ring(self.params["bb_window"], n_assets)
+        self._bb_sum = np.zeros(n_assets)
+        self._bb_sumsq = np.zeros(n_assets)
+        # rate of change
+        self._roc_ring = _Ring(self.params["roc_window"], n_assets)
+        self._last = {name: np.full(n_assets, np.nan) for name in self.OUTPUTS}
+    
+    def update(self, prices):
+        """fold one candle per asset into the state, returns the latest value of every indicator"""
+        x = np.asarray(prices, dtype=np.float64).reshape(self.n_assets)
+        valid = ~np.isnan(x)
+        out = self._last
+        
+        # rsi, wilder smoothing seeded with the simple average of the first window
+        w = self.params["rsi_window"]
+        has_prev = valid & ~np.isnan(self._prev)
+        delta = np.where(has_prev, x - np.nan_to_num(self._prev), 0.0)
+        gain, loss = np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+        self._deltas += has_prev
+        seeding = has_prev & (self._deltas <= w)
+        smoothing = has_prev & (self._deltas > w)
+        self._avg_gain[seeding] += gain[seeding] / w
+        self._avg_loss[seeding] += loss[seeding] / w
+        self._avg_gain[smoothing] = (self._avg_gain[smoothing] * (w - 1) + gain[smoothing]) / w
+        self._avg_loss[smoothing] = (self._avg_loss[smoothing] * (w - 1) + loss[smoothing]) / w
+        self._prev[valid] = x[valid]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+        rsi = np.where(self._avg_loss == 0, np.where(self._avg_gain > 0, 100.0, 50.0), rsi)
+        out["rsi"] = np.where(self._deltas >= w, rsi, np.nan)
+        
+        # macd
+        fast = self._fast.update(x, valid)
+        slow = self._slow.update(x, valid)
+        out["macd"] = fast - slow
+        out["macd_signal"] = self._signal.update(out["macd"], valid)
+        out["macd_hist"] = out["macd"] - out["macd_signal"]
+        
+        # bollinger bands from running sums over the window
+        bb_w = self.params["bb_window"]
+        dropped = self._bb_ring.push(x, valid)
+        has_dropped = ~np.isnan(dropped)
+        self._bb_sum[valid] += x[valid]
+        self._bb_sumsq[valid] += x[valid] ** 2
+        self._bb_sum[has_dropped] -= dropped[has_dropped]
+        self._bb_sumsq[has_dropped] -= dropped[has_dropped] ** 2
+        ready = self._bb_ring.count >= bb_w
+        mid = self._bb_sum / bb_w
+        std = np.sqrt(np.maximum(self._bb_sumsq / bb_w - mid ** 2, 0.0))
+        out["bb_mid"] = np.where(ready, mid, np.nan)
+        out["bb_upper"] = out["bb_mid"] + self.params["bb_k"] * std
+        out["bb_lower"] = out["bb_mid"] - self.params["bb_k"] * std
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out["bb_percent_b"] = (self._prev - out["bb_lower"]) / (out["bb_upper"] - out["bb_lower"])
+        
+        # rate of change against the price roc_window candles ago
+        dropped = self._roc_ring.push(x, valid)
+        roc = out["roc"].copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roc[valid] = (x[valid] / dropped[valid] - 1.0) * 100
+        out["roc"] = roc
+        
+        return {name: values.copy() for name, values in out.items()}
+    
+    def run(self, matrix):
+        """feed a (time x asset) price matrix, returns every indicator as a (time x asset) array"""
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(-1, self.n_assets)
+        results = {name: np.empty(matrix.shape) for name in self.OUTPUTS}
+        for t, row in enumerate(matrix):
+            latest = self.update(row)
+            for name in self.OUTPUTS:
+                results[name][t] = latest[name]
+        return results
+
+
+def compute_indicators(matrix, **params):
+    """every indicator for a (time x asset) price matrix, or a 1-d price series"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    series = matrix.ndim == 1
+    matrix = matrix.reshape(len(matrix), -1)
+    results = IndicatorEngine(matrix.shape[1], **params).run(matrix)
+    if series:
+        return {name: values[:, 0] for name, values in results.items()}
+    return results
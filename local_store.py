@@ -0,0 +1,77 @@
+import json
+import os
+import time
+from coincap_api import CoinCapAPI, CoinCapAPIError
+
+DEFAULT_STORE_DIR = os.path.join("crypto_data", "store")
+
+
+def history_dir(store_dir=DEFAULT_STORE_DIR):
+    """directory the refresher's HistoryStore persists candles in"""
+    return os.path.join(store_dir, "history")
+
+
+def publish(store_dir, name, data):
+    """atomically replace a published payload (assets, rates, ...)"""
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, f"{name}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"fetched_at": int(time.time() * 1000), "data": data}, f)
+    os.replace(tmp, path)
+
+
+class LocalStoreCoinCapAPI(CoinCapAPI):
+    """CoinCapAPI that reads what refresher.py published instead of calling CoinCap
+    
+    Files are re-read only when the refresher has replaced them. Anything the
+    refresher does not publish falls through to the live api unless
+    fallback_live is False.
+    """
+    
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, fallback_live=True, **kwargs):
+        super().__init__(**kwargs)
+        self.store_dir = store_dir
+        self.fallback_live = fallback_live
+        self._files = {}
+    
+    def _get(self, path, params=None, cache_name=None):
+        params = params or {}
+        data = None
+        if path == "/assets" and "offset" not in params:
+            data = self._read(os.path.join(self.store_dir, "assets.json"))
+            if data is not None and len(data) < int(params.get("limit", 100)):
+                data = None
+            elif data is not None:
+                data = data[:int(params.get("limit", 100))]
+        elif path == "/rates":
+            data = self._read(os.path.join(self.store_dir, "rates.json"))
+        elif path.endswith("/history"):
+            asset_id = path.split("/")[2]
+            series = self._read(os.path.join(history_dir(self.store_dir), f"{asset_id}_{params.get('interval')}.json"))
+            if series:
+                start, end = int(params.get("start", 0)), int(params.get("end", time.time() * 1000))
+                # only serve windows the store covers, otherwise the panel would silently lose its head
+                if series[0]["time"] <= start + 24 * 3_600_000:
+                    data = [candle for candle in series if start <= candle["time"] <= end]
+        
+        if data is not None:
+            return data
+        if not self.fallback_live:
+            raise CoinCapAPIError(f"{path} is not in the local store")
+        return super()._get(path, params=params, cache_name=cache_name)
+    
+    def _read(self, path):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        cached = self._files.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path) as f:
+                payload = json.load(f)
+            # history files are plain candle lists, published payloads are wrapped
+            data = payload["data"] if isinstance(payload, dict) else payload
+            cached = (mtime, data)
+            self._files[path] = cached
+        return cached[1]
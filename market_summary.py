@@ -18,6 +18,8 @@ st.empty()
 # part 2
 # 2x2 visualizations
 st.subheader(CONSTANTS['second_part']['dashboard']['title'])
+with st.spinner("Fetching price history..."):
+    visualizer.prefetch()
 viz2 = CONSTANTS['top_asset_performance']['dashboard']['title']
 viz1 = CONSTANTS['asset_risk_profile']['dashboard']['title']
 viz3 = CONSTANTS['price_correlation_matrix']['dashboard']['title']
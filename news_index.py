@@ -0,0 +1,292 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+#python news_index.py --articles crypto_data/raw/cryptonews_net_20241210.csv --out crypto_data/news_index.json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = "crypto_data/news_index.json"
+
+# names shorter than this only count when capitalized ("Near", "Flow"), longer ones in any case ("bitcoin")
+LOWERCASE_MIN_LEN = 7
+
+# multi-word names starting with one of these read as ordinary phrases in lowercase ("the graph")
+STOPWORDS = {'a', 'an', 'and', 'for', 'in', 'of', 'on', 'the', 'to'}
+
+_WORD = re.compile(r'[^\W_]+')
+
+class _Automaton:
+    """Aho-Corasick automaton over words instead of characters
+    
+    Patterns are word sequences (("shiba", "inu")), so matches always sit on word
+    boundaries and the scan takes one step per word of text rather than per character.
+    """
+    
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+    
+    def add(self, words, value):
+        state = 0
+        for ch in words:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(value)
+    
+    def build(self):
+        # breadth first, so every fail target is finished before it is used
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # a match at nxt also ends every shorter pattern its fail chain ends
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+    
+    def iter(self, words):
+        """yield (index of the last word, value) for every pattern occurrence in words"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(words):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for value in out[state]:
+                    yield i, value
+
+class AssetMatcher:
+    """Finds CoinCap assets mentioned in text with one pass of a multi-pattern automaton
+    
+    Every asset contributes its id, name and symbol, compiled once into a single
+    automaton instead of one regex per asset. Symbols must match case exactly
+    ("SOL", "$ETH") and short names must be capitalized, so ordinary words like
+    "one" or "near" are not counted. Separators between words do not matter,
+    "shiba-inu" and "Shiba Inu" are the same mention. A term shared by several
+    assets counts for the best ranked one only, and overlapping mentions count
+    once, for the longest ("Bitcoin Cash", not "Bitcoin").
+    """
+    
+    def __init__(self, assets):
+        self.automaton = _Automaton()
+        # lowercased words -> [(rank, asset id, kind, words as written, whether lowercase text counts)]
+        terms = defaultdict(list)
+        for position, asset in enumerate(assets):
+            # assets come ordered by market cap, the rank field wins when present
+            try:
+                rank = int(asset.get('rank'))
+            except (TypeError, ValueError):
+                rank = position + 1
+            symbol = asset.get('symbol')
+            if symbol and len(symbol) >= 2:
+                words = _WORD.findall(symbol)
+                terms[tuple(word.lower() for word in words)].append((rank, asset['id'], 'symbol', words, False))
+            for name in {asset.get('name'), asset.get('id')}:
+                if name:
+                    words = _WORD.findall(name)
+                    any_case = len(name) >= LOWERCASE_MIN_LEN and not (
+                        len(words) > 1 and words[0].lower() in STOPWORDS
+                    )
+                    terms[tuple(word.lower() for word in words)].append((rank, asset['id'], 'name', words, any_case))
+        for words, targets in terms.items():
+            if words:
+                # best rank first, find() credits the first target whose case rule holds
+                targets = tuple(target[1:] for target in sorted(targets, key=lambda target: target[0]))
+                self.automaton.add(words, (len(words), targets))
+        self.automaton.build()
+    
+    def find(self, text, tags=None):
+        """set of asset ids mentioned in text, plus those named in tags (e.g. the article's coins)
+        
+        Headlines and subheadings capitalize every word, so a short name that only
+        matched by being capitalized does not count at the start of a line or in a
+        Title Case line ("UniSwap (UNI) Price at Risk as Whale Dumps" mentions
+        UNI, not WHALE). Tags are asset names by definition and skip that check.
+        """
+        found = set()
+        for line in (text or '').splitlines():
+            found |= self._scan(line, headline_rule=True)
+        if tags:
+            found |= self._scan(tags, headline_rule=False)
+        return found
+    
+    def _scan(self, text, headline_rule):
+        words = _WORD.findall(text)
+        if not words:
+            return set()
+        headline = headline_rule and 2 * sum(word[0].isupper() for word in words) >= len(words)
+        # start word -> (length, asset id or None) of the longest mention starting there
+        longest = {}
+        for end, (length, targets) in self.automaton.iter([word.lower() for word in words]):
+            start = end - length + 1
+            if start in longest and longest[start][0] >= length:
+                continue
+            matched = words[start:end + 1]
+            for asset_id, kind, term_words, any_case in targets:
+                if kind == 'symbol':
+                    if matched == term_words:
+                        break
+                elif any_case or all(word[0].isupper() for word in matched):
+                    if not any_case and (headline or (headline_rule and start == 0)):
+                        # still the longest match here, so it hides the shorter ones inside it
+                        asset_id = None
+                    break
+            else:
+                continue
+            longest[start] = (length, asset_id)
+        found = set()
+        covered = -1
+        for start in sorted(longest):
+            length, asset_id = longest[start]
+            # skip mentions inside a longer one already counted
+            if start + length - 1 <= covered:
+                continue
+            if asset_id is not None:
+                found.add(asset_id)
+            covered = start + length - 1
+        return found
+
+class MentionIndex:
+    """Inverted index asset id -> [(published time in ms, article url)]"""
+    
+    def __init__(self, mentions=None):
+        self.mentions = defaultdict(list, mentions or {})
+    
+    def add(self, asset_ids, time_ms, article):
+        for asset_id in asset_ids:
+            self.mentions[asset_id].append((time_ms, article))
+    
+    def articles(self, asset_id, start_ms=None, end_ms=None):
+        """articles mentioning asset_id, oldest first"""
+        return sorted(
+            (time_ms, article) for time_ms, article in self.mentions.get(asset_id, [])
+            if (start_ms is None or time_ms >= start_ms) and (end_ms is None or time_ms <= end_ms)
+        )
+    
+    def volume(self, asset_ids, grid, step_ms):
+        """(len(grid) x len(asset_ids)) count of mentions per grid slot
+        
+        grid is the datetime64[ms] slot starts of a price matrix, e.g. frames.build_price_matrix(...).index
+        """
+        starts = np.asarray(grid).astype('datetime64[ms]').astype(np.int64)
+        counts = np.zeros((len(starts), len(asset_ids)), dtype=np.int64)
+        if not len(starts):
+            return counts
+        for j, asset_id in enumerate(asset_ids):
+            times = np.fromiter((time_ms for time_ms, _ in self.mentions.get(asset_id, [])), dtype=np.int64)
+            rows = np.searchsorted(starts, times, side='right') - 1
+            inside = (rows >= 0) & (times < starts[-1] + step_ms)
+            counts[:, j] = np.bincount(rows[inside], minlength=len(starts))
+        return counts
+    
+    def save(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"built_at": int(time.time() * 1000), "mentions": self.mentions}, f)
+        os.replace(tmp, path)
+    
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            payload = json.load(f)
+        return cls({asset_id: [tuple(m) for m in mentions] for asset_id, mentions in payload["mentions"].items()})
+
+def iter_articles(path):
+    """yield scraped article dicts from a scraper output file (.csv, .jsonl, .parquet, .sqlite/.db)"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.jsonl':
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif ext == '.csv':
+        for chunk in pd.read_csv(path, chunksize=1000, dtype=str, keep_default_na=False):
+            yield from chunk.to_dict('records')
+    elif ext == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=1000):
+            yield from batch.to_pylist()
+    elif ext in ('.sqlite', '.db'):
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            for row in conn.execute("SELECT * FROM articles"):
+                yield dict(row)
+        finally:
+            conn.close()
+    else:
+        raise ValueError(f"Unsupported articles file {path}")
+
+def _published_ms(article):
+    """publish time in ms (naive times are UTC, as the scrapers write them), None if missing"""
+    value = article.get('datetime_published') or article.get('date_published')
+    if not value:
+        return None
+    try:
+        published = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return int(published.timestamp() * 1000)
+
+def build_index(articles, matcher, index=None):
+    """match every article's title, coins and content; returns (index, articles indexed)"""
+    index = index or MentionIndex()
+    indexed = 0
+    for article in articles:
+        time_ms = _published_ms(article)
+        if time_ms is None:
+            continue
+        text = '\n'.join(str(article.get(field) or '') for field in ('title', 'content'))
+        found = matcher.find(text, tags=str(article.get('coins') or ''))
+        index.add(found, time_ms, article.get('url') or article.get('data_id'))
+        indexed += 1
+    return index, indexed
+
+if __name__ == "__main__":
+    from replay_api import make_api
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--articles', nargs='+', required=True, help='Scraper output files (.csv, .jsonl, .parquet, .sqlite)')
+    parser.add_argument('--out', default=DEFAULT_INDEX_PATH, help='Where to save the index')
+    parser.add_argument('--assets_limit', type=int, default=500, help='Match against the top N assets by market cap')
+    args = parser.parse_args()
+    
+    matcher = AssetMatcher(make_api().get_assets(limit=args.assets_limit))
+    index = MentionIndex()
+    started = time.perf_counter()
+    total = 0
+    for path in args.articles:
+        index, indexed = build_index(iter_articles(path), matcher, index)
+        total += indexed
+        logger.info(f"{path}: {indexed} articles indexed")
+    elapsed = time.perf_counter() - started
+    
+    index.save(args.out)
+    logger.info(f"{total} articles, {len(index.mentions)} assets mentioned, "
+                f"{total / elapsed if elapsed else 0:.0f} articles/s, saved to {args.out}")
@@ -2,24 +2,92 @@ import streamlit as st
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import pandas as pd
-from coincap_api import CoinCapAPI
+import numpy as np
+from app import get_history_store
+from frames import history_to_frame
+from indicators import compute_indicators
+from resample import downsample, to_ohlc
 import sys
 sys.path.append('../..')  # Go up two levels to reach main directory
 
-def calculate_momentum(prices, window=24):
-    """calculate momentum similar to relative strength index"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
+def momentum_sums(prices):
+    """cumulative gains and losses, from which the momentum can be derived for any window"""
+    delta = np.diff(prices.to_numpy(), prepend=np.nan)
+    gain_cs = np.cumsum(np.where(delta > 0, delta, 0))
+    loss_cs = np.cumsum(np.where(delta < 0, -delta, 0))
+    return gain_cs, loss_cs
+
+def momentum_from_sums(gain_cs, loss_cs, window=24):
+    """momentum similar to relative strength index, as an O(n) difference of precomputed cumulative sums"""
+    gain_cs = np.concatenate(([0.0], gain_cs))
+    loss_cs = np.concatenate(([0.0], loss_cs))
+    gain = np.full(len(gain_cs) - 1, np.nan)
+    loss = np.full(len(loss_cs) - 1, np.nan)
+    gain[window - 1:] = (gain_cs[window:] - gain_cs[:-window]) / window
+    loss[window - 1:] = (loss_cs[window:] - loss_cs[:-window]) / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+# indicator label -> (engine output or None for momentum_from_sums, y2 axis range, engine param set by the window slider)
+INDICATORS = {
+    "Momentum": (None, [0, 100], None),
+    "RSI (Wilder)": ("rsi", [0, 100], "rsi_window"),
+    "MACD Histogram": ("macd_hist", None, None),
+    "Bollinger %B": ("bb_percent_b", None, "bb_window"),
+    "Rate of Change (%)": ("roc", None, "roc_window")
+}
+
+# the page always holds this much h1 history; shorter lookbacks are slices of it
+MAX_LOOKBACK_D = 30
+HISTORY_TTL_S = 300
+
+# candles the price is read from, finer ones are aggregated into h1 OHLC candles
+SOURCE_INTERVALS = {
+    "1 hour": "h1",
+    "15 minutes": "m15",
+    "5 minutes": "m5"
+}
+
+@st.cache_data(ttl=HISTORY_TTL_S, show_spinner=False)
+def load_price_history(asset_id, interval='h1', lookback_d=MAX_LOOKBACK_D):
+    """max-window h1 price frame with momentum cumulative sums, shared by every session and slider position
+    
+    A finer source interval is aggregated to h1 candles (open/high/low columns,
+    priceUsd is the close) so indicator windows stay in hours and the chart
+    payload does not grow with the source resolution.
+    """
+    end_time = int(datetime.now().timestamp() * 1000)
+    start_time = int((datetime.now() - timedelta(days=lookback_d)).timestamp() * 1000)
+    history = get_history_store().get_asset_history(
+        asset_id,
+        interval=interval,
+        start=start_time,
+        end=end_time
+    )
+    df = history_to_frame(history)
+    if interval != 'h1':
+        times, open_, high, low, close = to_ohlc(df['time'], df['priceUsd'], 'h1')
+        df = pd.DataFrame({'time': times, 'open': open_, 'high': high, 'low': low, 'priceUsd': close})
+    df['gain_cs'], df['loss_cs'] = momentum_sums(df['priceUsd'])
+    return df
+
+@st.cache_data(ttl=HISTORY_TTL_S, show_spinner=False)
+def calculate_indicator(_df, asset_id, indicator, window=24, as_of=None, interval='h1'):
+    """selected indicator over the loaded max-window history _df, computed in memory
+    
+    _df is not hashed, as_of (its last timestamp) and its source interval key
+    the cache so a refetched history never reuses values computed from another.
+    """
+    df = _df
+    output, _, window_param = INDICATORS[indicator]
+    if output is None:
+        return momentum_from_sums(df['gain_cs'].to_numpy(), df['loss_cs'].to_numpy(), window=window)
+    params = {window_param: window} if window_param else {}
+    return compute_indicators(df['priceUsd'].to_numpy(), **params)[output]
 
 def create_momentum_page():
     st.title("Price Momentum Analysis")
     
-    # Initialize API
-    api = CoinCapAPI()
-    
     # Sidebar controls
     st.sidebar.header("Configuration")
     
@@ -45,73 +113,90 @@ def create_momentum_page():
     lookback_days = st.sidebar.slider(
         "Lookback Period (days)", 
         min_value=7,
-        max_value=30,
+        max_value=MAX_LOOKBACK_D,
         value=21
     )
     
+    indicator = st.sidebar.selectbox(
+        "Indicator",
+        list(INDICATORS.keys())
+    )
+    
     window = st.sidebar.slider(
-        "Momentum Window (hours)",
+        "Indicator Window (hours)",
         min_value=6,
         max_value=72,
         value=24
     )
     
-    try:
-        # Fix timestamp calculation
-        end_time = int(datetime.now().timestamp() * 1000)
-        start_time = int((datetime.now() - timedelta(days=lookback_days)).timestamp() * 1000)
-        
-        # Get historical data
-        history = api.get_asset_history(
-            selected_asset_id,
-            interval='h1',
-            start=start_time,
-            end=end_time
-        )
+    source = st.sidebar.selectbox(
+        "Source Interval",
+        list(SOURCE_INTERVALS.keys())
+    )
+    source_interval = SOURCE_INTERVALS[source]
     
-        # Process data
-        df = pd.DataFrame(history)
-        df['time'] = pd.to_datetime(df['time'].astype(int), unit='ms')
-        df['priceUsd'] = df['priceUsd'].astype(float)
+    try:
+        # Get the cached max-window history, only refetched once it expires
+        df = load_price_history(selected_asset_id, interval=source_interval)
         
-        # Calculate momentum
-        df['momentum'] = calculate_momentum(df['priceUsd'], window=window)
+        # Calculate momentum over the full history so the window is warmed up, then slice the lookback
+        df = df.assign(momentum=calculate_indicator(
+            df, selected_asset_id, indicator, window=window,
+            as_of=df['time'].iloc[-1] if len(df) else None, interval=source_interval
+        ))
+        start_time = int((datetime.now() - timedelta(days=lookback_days)).timestamp() * 1000)
+        df = df[df['time'] >= np.datetime64(start_time, 'ms')]
         
         # Create figure
         fig = go.Figure()
         
-        # Add price line
-        fig.add_trace(go.Scatter(
-            x=df['time'],
-            y=df['priceUsd'],
-            name='Price',
-            line=dict(color='blue'),
-            yaxis='y'
-        ))
+        if 'high' in df:
+            # h1 candles aggregated from the finer source, at most one per hour whatever the source
+            fig.add_trace(go.Candlestick(
+                x=df['time'],
+                open=df['open'],
+                high=df['high'],
+                low=df['low'],
+                close=df['priceUsd'],
+                name='Price',
+                yaxis='y'
+            ))
+        else:
+            # Add price line, min/max bucketing keeps the price extremes visible
+            price_x, price_y = downsample(df['time'].to_numpy(), df['priceUsd'].to_numpy(), method='minmax')
+            fig.add_trace(go.Scatter(
+                x=price_x,
+                y=price_y,
+                name='Price',
+                line=dict(color='blue'),
+                yaxis='y'
+            ))
         
         # Add momentum line  
+        momentum_x, momentum_y = downsample(df['time'].to_numpy(), df['momentum'].to_numpy())
         fig.add_trace(go.Scatter(
-            x=df['time'],
-            y=df['momentum'],
-            name='Momentum',
+            x=momentum_x,
+            y=momentum_y,
+            name=indicator,
             line=dict(color='red'),
             yaxis='y2'
         ))
         
         # Update layout
         fig.update_layout(
-            title=f'{selected_asset} Price and Momentum Analysis',
+            title=f'{selected_asset} Price and {indicator} Analysis',
             yaxis=dict(
                 title='Price (USD)',
                 tickformat='$,.2f'
             ),
             yaxis2=dict(
-                title='Momentum',
+                title=indicator,
                 overlaying='y',
                 side='right',
-                range=[0, 100] 
+                range=INDICATORS[indicator][1]
             ),
             hovermode='x unified',
+            xaxis_rangeslider_visible=False,
             height=600
         )
         
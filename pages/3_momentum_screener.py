@@ -0,0 +1,133 @@
+import streamlit as st
+from datetime import datetime, timedelta
+import pandas as pd
+import numpy as np
+from app import get_shared_cache, get_history_store
+from replay_api import make_api
+from api_cache import INTERVAL_MS
+from frames import history_to_frame, build_price_matrix
+from indicators import compute_indicators
+import sys
+sys.path.append('../..')  # Go up two levels to reach main directory
+
+SCREENER_TTL_S = 300
+OVERBOUGHT = 70
+OVERSOLD = 30
+
+@st.cache_data(ttl=SCREENER_TTL_S, show_spinner=False)
+def screen_assets(top_n=100, lookback_d=14, rsi_window=14, interval='h1'):
+    """latest indicators for the top N assets, one row per asset"""
+    api = make_api(cache=get_shared_cache())
+    assets = api.get_assets(limit=top_n)
+    
+    # one concurrent batch for every history, then one matrix for the indicator engine
+    now = datetime.now()
+    end = int(now.timestamp() * 1000)
+    start = int((now - timedelta(days=lookback_d)).timestamp() * 1000)
+    histories = get_history_store().get_asset_histories(
+        [asset['id'] for asset in assets],
+        interval=interval,
+        start=start,
+        end=end
+    )
+    frames = {asset_id: history_to_frame(history) for asset_id, history in histories.items() if history}
+    if not frames:
+        return pd.DataFrame()
+    matrix = build_price_matrix(frames, INTERVAL_MS[interval], start, end)
+    indicators = compute_indicators(matrix.to_numpy(), rsi_window=rsi_window)
+    latest = {name: values[-1] for name, values in indicators.items()}
+    
+    info = pd.DataFrame(assets).set_index('id').loc[list(matrix.columns)]
+    df = pd.DataFrame({
+        'Rank': info['rank'].astype(int).to_numpy(),
+        'Name': info['name'].to_numpy(),
+        'Symbol': info['symbol'].to_numpy(),
+        'Price (USD)': info['priceUsd'].astype(float).to_numpy(),
+        '24h Change (%)': info['changePercent24Hr'].astype(float).to_numpy(),
+        'RSI': latest['rsi'],
+        f'ROC {lookback_d}D (%)': (matrix.iloc[-1].to_numpy() / matrix.bfill().iloc[0].to_numpy() - 1) * 100,
+        'Bollinger %B': latest['bb_percent_b'],
+        'MACD Hist': latest['macd_hist']
+    })
+    df['Signal'] = np.select(
+        [df['RSI'] >= OVERBOUGHT, df['RSI'] <= OVERSOLD],
+        ['Overbought', 'Oversold'],
+        default='Neutral'
+    )
+    return df.sort_values('RSI', ascending=False, na_position='last').reset_index(drop=True)
+
+def create_screener_page():
+    st.title("Momentum Screener")
+    
+    # Sidebar controls
+    st.sidebar.header("Configuration")
+    
+    top_n = st.sidebar.slider(
+        "Assets to Screen",
+        min_value=10,
+        max_value=500,
+        value=100,
+        step=10
+    )
+    
+    lookback_days = st.sidebar.slider(
+        "Lookback Period (days)",
+        min_value=7,
+        max_value=30,
+        value=14
+    )
+    
+    rsi_window = st.sidebar.slider(
+        "RSI Window (hours)",
+        min_value=6,
+        max_value=72,
+        value=14
+    )
+    
+    try:
+        with st.spinner(f"Screening top {top_n} assets..."):
+            df = screen_assets(top_n=top_n, lookback_d=lookback_days, rsi_window=rsi_window)
+        
+        if df.empty:
+            st.warning("No price history available.")
+            return
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader(f"🔥 Overbought (RSI ≥ {OVERBOUGHT})")
+            st.dataframe(df[df['Signal'] == 'Overbought'], hide_index=True, use_container_width=True)
+        with col2:
+            st.subheader(f"🧊 Oversold (RSI ≤ {OVERSOLD})")
+            st.dataframe(
+                df[df['Signal'] == 'Oversold'].sort_values('RSI'),
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        st.subheader("All Assets")
+        st.dataframe(
+            df,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'Price (USD)': st.column_config.NumberColumn(format="$%.4f"),
+                '24h Change (%)': st.column_config.NumberColumn(format="%.2f"),
+                'RSI': st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.1f"),
+                'Bollinger %B': st.column_config.NumberColumn(format="%.2f"),
+                'MACD Hist': st.column_config.NumberColumn(format="%.4g")
+            }
+        )
+        
+        with st.expander("Understanding the Screener"):
+            st.write(f"""
+            RSI uses Wilder smoothing over hourly candles; click a column header to sort.
+            - RSI at or above {OVERBOUGHT} may indicate overbought conditions
+            - RSI at or below {OVERSOLD} may indicate oversold conditions
+            - Bollinger %B above 1 or below 0 means the price is outside the bands
+            """)
+    
+    except Exception as e:
+        st.error(f"Error fetching data: {str(e)}")
+
+if __name__ == "__main__":
+    create_screener_page()
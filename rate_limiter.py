@@ -0,0 +1,144 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+# CoinCap allows 200 requests per minute without an api key
+DEFAULT_RATE_PER_MIN = 200
+
+# lower runs first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+
+class RequestScheduler:
+    """Token bucket shared by every CoinCapAPI in the process
+    
+    acquire() blocks until a request may go out, acquire_async() is the same for
+    coroutines; waiters are served by priority (interactive before background)
+    and then in arrival order. single_flight()
+    lets identical concurrent requests share one call.
+    """
+    
+    def __init__(self, rate_per_min=DEFAULT_RATE_PER_MIN, burst=None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = burst or max(1, rate_per_min // 10)
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # metrics
+        self.requests = 0
+        self.deduplicated = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+    
+    def acquire(self, priority=INTERACTIVE):
+        """wait for a token, returns the seconds spent waiting"""
+        enqueued = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            while True:
+                self._refill()
+                at_head = self._waiters[0] == ticket
+                if at_head and self.tokens >= 1:
+                    return self._grant(enqueued)
+                # only the head sleeps until its token is due, the rest wait to be promoted
+                self._cond.wait((1 - self.tokens) / self.rate if at_head else None)
+    
+    async def acquire_async(self, priority=INTERACTIVE):
+        """awaitable acquire(), sleeps on the event loop instead of blocking a thread"""
+        enqueued = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+        try:
+            while True:
+                with self._cond:
+                    self._refill()
+                    if self._waiters[0] == ticket and self.tokens >= 1:
+                        return self._grant(enqueued)
+                    # sleep until enough tokens for every waiter ahead of us and ours
+                    ahead = sum(1 for waiter in self._waiters if waiter < ticket)
+                    delay = (ahead + 1 - self.tokens) / self.rate
+                await asyncio.sleep(max(delay, 0.001))
+        except BaseException:
+            # cancelled while queued, do not leave a ticket that blocks everyone behind it
+            with self._cond:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+            raise
+    
+    def single_flight(self, key, fn):
+        """run fn once for all concurrent callers with the same key"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.deduplicated += 1
+        if not leader:
+            return future.result()
+        
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+    
+    def stats(self):
+        with self._cond:
+            self._refill()
+            return {
+                "queue_depth": len(self._waiters),
+                "in_flight": len(self._inflight),
+                "requests": self.requests,
+                "deduplicated": self.deduplicated,
+                "avg_wait_s": self.total_wait_s / self.requests if self.requests else 0.0,
+                "max_wait_s": self.max_wait_s,
+                "tokens": self.tokens
+            }
+    
+    def _grant(self, enqueued):
+        """hand the head waiter its token, called with the condition held"""
+        heapq.heappop(self._waiters)
+        self.tokens -= 1
+        waited = time.monotonic() - enqueued
+        self.requests += 1
+        self.total_wait_s += waited
+        self.max_wait_s = max(self.max_wait_s, waited)
+        # let the next waiter become head
+        self._cond.notify_all()
+        return waited
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+def default_scheduler():
+    """the process-wide scheduler CoinCapAPI uses unless given its own"""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
@@ -0,0 +1,77 @@
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from constants import CONSTANTS
+from coincap_api import CoinCapAPI
+from rate_limiter import BACKGROUND
+from history_store import HistoryStore
+from local_store import DEFAULT_STORE_DIR, history_dir, publish
+
+# python refresher.py --store_dir crypto_data/store
+# then run the dashboard with COINCAP_API_MODE=store COINCAP_STORE_DIR=crypto_data/store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PANELS = ['asset_risk_profile', 'top_asset_performance', 'price_correlation_matrix', 'asset_group_performance']
+
+def panel_windows():
+    """(interval, longest lookback) for every interval the dashboard panels use"""
+    windows = {}
+    for panel in PANELS:
+        calcs = CONSTANTS[panel]['calcs']
+        windows[calcs['interval']] = max(windows.get(calcs['interval'], 0), calcs['lookback_d'])
+    return windows
+
+def refresh_once(api, store, store_dir):
+    """pull assets, rates and panel histories and publish them to the local store"""
+    started = time.monotonic()
+    settings = CONSTANTS['refresher']['calcs']
+    
+    assets = api.get_assets(limit=settings['assets_limit'])
+    publish(store_dir, 'assets', assets)
+    publish(store_dir, 'rates', api.get_rates())
+    
+    asset_ids = [asset['id'] for asset in assets[:settings['history_top_n']]]
+    for group_ids in CONSTANTS['asset_group_performance']['calcs']['groups'].values():
+        asset_ids.extend(group_ids)
+    
+    now = datetime.now()
+    for interval, lookback_d in panel_windows().items():
+        histories = store.get_asset_histories(
+            asset_ids,
+            interval=interval,
+            start=int((now - timedelta(days=lookback_d)).timestamp() * 1000),
+            end=int(now.timestamp() * 1000)
+        )
+        missing = sorted(set(asset_ids) - set(histories))
+        if missing:
+            logger.warning(f"No {interval} history for: {', '.join(missing)}")
+    
+    logger.info(f"Refreshed {len(assets)} assets and {len(set(asset_ids))} histories "
+                f"in {time.monotonic() - started:.1f}s")
+
+def run(store_dir=DEFAULT_STORE_DIR, interval_s=None, once=False):
+    api = CoinCapAPI(priority=BACKGROUND)
+    store = HistoryStore(api, path=history_dir(store_dir), max_age_d=CONSTANTS['refresher']['calcs']['max_age_d'])
+    interval_s = interval_s or CONSTANTS['refresher']['calcs']['interval_s']
+    
+    while True:
+        started = time.monotonic()
+        try:
+            refresh_once(api, store, store_dir)
+        except Exception as e:
+            logger.error(f"Refresh failed: {e}")
+        if once:
+            break
+        time.sleep(max(0, interval_s - (time.monotonic() - started)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store_dir', default=DEFAULT_STORE_DIR, help='Directory the dashboard reads from')
+    parser.add_argument('--interval_s', type=int, help='Seconds between refreshes')
+    parser.add_argument('--once', action='store_true', help='Refresh a single time and exit')
+    args = parser.parse_args()
+    
+    run(store_dir=args.store_dir, interval_s=args.interval_s, once=args.once)
@@ -0,0 +1,180 @@
+import csv
+import glob
+import json
+import os
+import threading
+from coincap_api import CoinCapAPI, CoinCapAPIError
+from api_cache import INTERVAL_MS
+from local_store import LocalStoreCoinCapAPI, DEFAULT_STORE_DIR
+import snapshots
+
+DEFAULT_REPLAY_DIR = os.path.join("crypto_data", "recordings")
+RAW_SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "raw_samples")
+
+# params that only pick a slice of a recording rather than a different recording
+SLICE_PARAMS = {"limit", "offset", "start", "end"}
+
+
+def recording_name(path, params=None):
+    """file name of the recording for a request, ignoring params that only slice it"""
+    parts = [path.strip("/").replace("/", "__")]
+    for key, value in sorted((params or {}).items()):
+        if key not in SLICE_PARAMS:
+            parts.append(f"{key}={value}")
+    return "__".join(parts) + ".json"
+
+
+class ReplayCoinCapAPI(CoinCapAPI):
+    """CoinCapAPI served from recorded responses instead of api.coincap.io
+    
+    mode="replay" only reads recordings, falling back to the latest Parquet
+    snapshot under snapshot_root (see snapshots.py) and then to the CSV dumps
+    in data/raw_samples. mode="record" calls the live api and saves every
+    response so it can be replayed later.
+    """
+    
+    def __init__(self, replay_dir=DEFAULT_REPLAY_DIR, mode="replay", samples_dir=RAW_SAMPLES_DIR,
+                 snapshot_root=snapshots.DEFAULT_ROOT, **kwargs):
+        super().__init__(**kwargs)
+        if mode not in ("replay", "record"):
+            raise ValueError(f"unknown replay mode: {mode}")
+        self.replay_dir = replay_dir
+        self.mode = mode
+        self.samples_dir = samples_dir
+        self.snapshot_root = snapshot_root
+        self._recordings = {}
+        self._lock = threading.Lock()
+        if mode == "record":
+            os.makedirs(replay_dir, exist_ok=True)
+    
+    def _get(self, path, params=None, cache_name=None):
+        name = recording_name(path, params)
+        if self.mode == "record":
+            data = super()._get(path, params=params, cache_name=cache_name)
+            self._record(name, path, params, data)
+            return data
+        
+        data = self._load(name)
+        if data is None:
+            raise CoinCapAPIError(f"no recording for {path} {params or {}}")
+        return self._slice(data, params or {})
+    
+    def _record(self, name, path, params, data):
+        with self._lock:
+            existing = self._load(name)
+            if "limit" in (params or {}) and not path.endswith("/history"):
+                # a page goes in at its offset, so the pages of iter_pages() add up to one recording and
+                # a limit=5 call only refreshes the first rows of a limit=100 one
+                offset, limit = int(params.get("offset", 0)), int(params["limit"])
+                rows = list(existing or [])
+                rows += [None] * (offset - len(rows))
+                # a short page is the end of the list, rows recorded past it are gone
+                tail = rows[offset + len(data):] if len(data) >= limit else []
+                data = rows[:offset] + list(data) + tail
+            elif existing is not None and path.endswith("/history"):
+                by_time = {int(d["time"]): d for d in existing}
+                by_time.update((int(d["time"]), d) for d in data)
+                data = [by_time[t] for t in sorted(by_time)]
+            with open(os.path.join(self.replay_dir, name), "w") as f:
+                json.dump({"path": path, "params": params or {}, "data": data}, f)
+            self._recordings[name] = data
+    
+    def _load(self, name):
+        if name not in self._recordings:
+            data = None
+            path = os.path.join(self.replay_dir, name)
+            if os.path.exists(path):
+                with open(path) as f:
+                    data = json.load(f)["data"]
+            elif self.mode == "replay":
+                data = self._load_snapshot(name)
+                if data is None:
+                    data = self._load_sample(name)
+            self._recordings[name] = data
+        return self._recordings[name]
+    
+    def _load_snapshot(self, name):
+        """rows from the latest snapshot of the endpoint, e.g. endpoint=assets or endpoint=history/key=bitcoin_h1"""
+        if not self.snapshot_root:
+            return None
+        slug = name[:-len(".json")]
+        parts = slug.split("__")
+        filters = {}
+        if len(parts) == 4 and parts[0] == "assets" and parts[2] == "history" and parts[3].startswith("interval="):
+            endpoint, key = "history", f"{parts[1]}_{parts[3][len('interval='):]}"
+        elif parts[0] in snapshots.SCHEMAS and parts[0] != "history":
+            endpoint, key = parts[0], None
+            # markets__baseId=bitcoin is the markets snapshot filtered to that asset
+            for part in parts[1:]:
+                column, _, value = part.partition("=")
+                filters[column] = value
+        else:
+            return None
+        try:
+            df = snapshots.read_snapshot(endpoint, root=self.snapshot_root, key=key)
+        except (FileNotFoundError, OSError):
+            return None
+        for column, value in filters.items():
+            if column not in df:
+                return None
+            df = df[df[column].astype(str) == value]
+        # missing values as None, like the api's nulls
+        return df.astype(object).where(df.notna(), None).to_dict("records")
+    
+    def _load_sample(self, name):
+        """rows from the newest matching CSV dump, e.g. assets_20241209.csv or bitcoin_history_20241209.csv"""
+        if not self.samples_dir:
+            return None
+        slug = name[:-len(".json")]
+        if slug.startswith("assets__") and "__history__" in slug:
+            # assets__<id>__history__interval=h1, samples are h1 candles
+            asset_id = slug.split("__")[1]
+            if not slug.endswith("interval=h1"):
+                return None
+            pattern = f"{asset_id}_history_*.csv"
+        elif "__" in slug:
+            return None
+        else:
+            pattern = f"{slug}_*.csv"
+        
+        files = sorted(glob.glob(os.path.join(self.samples_dir, pattern)))
+        if not files:
+            return None
+        with open(files[-1], newline="") as f:
+            rows = [{k: (v if v != "" else None) for k, v in row.items()} for row in csv.DictReader(f)]
+        for row in rows:
+            if "time" in row:
+                row["time"] = int(row["time"])
+        return rows
+    
+    def _slice(self, data, params):
+        if "start" in params and "end" in params and data and "time" in data[0]:
+            # recordings are from the past: shift them by whole candles so the last one lands on
+            # the requested end, then replay the requested window
+            start, end = int(params["start"]), int(params["end"])
+            step = INTERVAL_MS.get(params.get("interval"), 1)
+            shift = max(0, (end - int(data[-1]["time"])) // step * step)
+            return [dict(d, time=int(d["time"]) + shift) for d in data
+                    if start <= int(d["time"]) + shift <= end]
+        offset = int(params.get("offset", 0))
+        if "limit" in params:
+            data = data[offset:offset + int(params["limit"])]
+        else:
+            data = data[offset:]
+        # None marks a page not recorded yet (parallel pages saved out of order by an interrupted run)
+        return [d for d in data if d is not None]
+
+
+def make_api(**kwargs):
+    """CoinCapAPI, ReplayCoinCapAPI or LocalStoreCoinCapAPI depending on COINCAP_API_MODE
+    (live, replay, record, store)
+    """
+    mode = os.environ.get("COINCAP_API_MODE", "live")
+    if mode == "live":
+        return CoinCapAPI(**kwargs)
+    if mode == "store":
+        store_dir = os.environ.get("COINCAP_STORE_DIR", DEFAULT_STORE_DIR)
+        return LocalStoreCoinCapAPI(store_dir=store_dir, **kwargs)
+    replay_dir = os.environ.get("COINCAP_REPLAY_DIR", DEFAULT_REPLAY_DIR)
+    snapshot_root = os.environ.get("COINCAP_SNAPSHOT_DIR", snapshots.DEFAULT_ROOT)
+    return ReplayCoinCapAPI(replay_dir=replay_dir, mode=mode, snapshot_root=snapshot_root, **kwargs)
@@ -0,0 +1,99 @@
+import numpy as np
+from api_cache import INTERVAL_MS
+
+# default point budget per chart trace
+MAX_POINTS = 1000
+
+
+def _as_numeric(x):
+    """x as float64 for distance math, datetime64 is taken in milliseconds"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb(x, y, max_points=MAX_POINTS):
+    """indices of a Largest-Triangle-Three-Buckets downsample of (x, y) to max_points
+    
+    Keeps the first and last point and, per bucket, the point forming the largest
+    triangle with the previous pick and the next bucket's average, which preserves
+    the visual shape (peaks included) of the line.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    xs = _as_numeric(x)
+    ys = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    picked = np.empty(max_points, dtype=np.int64)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        if next_stop > stop:
+            avg_x, avg_y = xs[stop:next_stop].mean(), ys[stop:next_stop].mean()
+        else:
+            avg_x, avg_y = xs[n - 1], ys[n - 1]
+        areas = np.abs((xs[a] - avg_x) * (ys[start:stop] - ys[a]) - (xs[a] - xs[start:stop]) * (avg_y - ys[a]))
+        a = start + int(np.argmax(areas))
+        picked[i + 1] = a
+    return picked
+
+
+def min_max(y, max_points=MAX_POINTS):
+    """indices keeping the min and max of each of max_points // 2 equal buckets, in order"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    # two picks per bucket plus the fixed first and last point
+    n_buckets = (max_points - 2) // 2
+    if max_points >= n or n_buckets < 1:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    # all-NaN buckets (only possible in the padding) fall back to their first slot
+    filled = np.where(np.isnan(buckets), np.inf, buckets)
+    lows = filled.argmin(axis=1)
+    filled = np.where(np.isnan(buckets), -np.inf, buckets)
+    highs = filled.argmax(axis=1)
+    offsets = np.arange(n_buckets) * size
+    picked = np.unique(np.concatenate([offsets + lows, offsets + highs, [0, n - 1]]))
+    return picked[picked < n]
+
+
+def downsample(x, y, max_points=MAX_POINTS, method='lttb'):
+    """(x, y) reduced to at most max_points points with 'lttb' or 'minmax'"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    picked = lttb(x, y, max_points) if method == 'lttb' else min_max(y, max_points)
+    return x[picked], y[picked]
+
+
+def to_ohlc(times, prices, interval):
+    """aggregate a finer price series into OHLC candles of a coarser interval (e.g. 'h1')
+    
+    Returns (bucket start times as datetime64[ms], open, high, low, close).
+    """
+    times_ms = np.asarray(times).astype('datetime64[ms]').astype(np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    if times_ms.size == 0:
+        empty = np.array([], dtype=np.float64)
+        return np.array([], dtype='datetime64[ms]'), empty, empty, empty, empty
+    step = INTERVAL_MS[interval]
+    buckets = times_ms // step
+    # assumes times are sorted, which CoinCap history always is
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(prices)] - 1
+    return (
+        (buckets[starts] * step).astype('datetime64[ms]'),
+        prices[starts],
+        np.maximum.reduceat(prices, starts),
+        np.minimum.reduceat(prices, starts),
+        prices[ends]
+    )
@@ -1,19 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
 import logging
 from datetime import datetime, timedelta
 import pandas as pd
 import argparse
 import re
+from crawler import Crawler
+from crawl_state import CrawlState, default_state_path
+from extract import ParserPool
+from sinks import open_sink
 
 # logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-
 # convert article time published "21m" to timedelta
 def parse_time_ago(time_string):
     """Parses a string like '21 m' to a timedelta object"""
@@ -32,30 +30,21 @@ def parse_time_ago(time_string):
         return timedelta(days=number)
 
 # scrape a single article's detailed content
-def scrape_article(url, data_id):
-    response = requests.get(url, headers=headers)
+def scrape_article(url, data_id, crawler, parsers=None):
+    # only articles not stored yet get here, a 304 would mean one whose run died before saving it
+    response = crawler.fetch(url, conditional=False)
     
-    if response.status_code != 200:
-        logger.error(f"Failed to retrieve article. Status code: {response.status_code}")
+    if response is None or response.status_code != 200:
         return None
     
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # title
-    title_tag = soup.find('h1', class_='article_title')
-    title = title_tag.get_text() if title_tag else None
-    
-    # content
-    content_tag = soup.find('div', class_='cn-content') 
-    content = content_tag.get_text(separator="\n", strip=True) if content_tag else None
-    
-    # source link
-    source_link_tag = soup.find('a', class_='source-host')
-    source_link = source_link_tag.get('href') if source_link_tag else None
+    # selectors live in extract.py under 'cryptonews_article_detail'
+    fields = (parsers or ParserPool()).extract('cryptonews_article_detail', response.content)
+    title = fields['title']
+    content = fields['content']
+    source_link = fields['source_link']
     
     # time ago (e.g., '21 m' for 21 minutes ago)
-    time_tag = soup.find('span', class_='datetime flex middle-xs')
-    time_ago = time_tag.get_text(strip=True) if time_tag else '0 m'
+    time_ago = fields['time_ago'] if fields['time_ago'] is not None else '0 m'
     
     # convert time ago to datetime
     time_delta = parse_time_ago(time_ago)
@@ -64,9 +53,7 @@ def scrape_article(url, data_id):
     else:
         datetime_published = datetime.utcnow()
     
-    # image url
-    image_tag = soup.find('div', class_='news-item detail content_text')
-    image_url = image_tag.get('data-image') if image_tag else None
+    image_url = fields['image_url']
     
     article_data = {
         'data_id': data_id, 
@@ -98,40 +85,62 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('csv_file', help='Path to the input CSV file containing article URLs')
     parser.add_argument('--stop_at_article_count', type=int, help='Stop after scraping this number of articles')
+    parser.add_argument('--concurrency', type=int, default=8, help='Articles fetched at once')
+    parser.add_argument('--rate_per_s', type=float, default=2.0, help='Most requests per second to the site')
+    parser.add_argument('--parse_processes', type=int, default=0, help='Parse pages on this many processes (0: in the crawler threads)')
+    parser.add_argument('--output', help='Output file, .csv/.jsonl/.parquet/.sqlite (default: cryptonews_net_articles_<date>.csv)')
+    parser.add_argument('--batch_size', type=int, default=100, help='Articles written per flush')
+    parser.add_argument('--state_db', default=default_state_path('articles'), help='Crawl state index kept across runs of this scraper')
     args = parser.parse_args()
 
     # log input file URL
     logger.info(f"Input CSV file: {args.csv_file}")
     
     # read the input CSV with URLs
-    df = pd.read_csv(args.csv_file)
-    article_urls = df['url'].tolist()
-
-    article_data_list_full = []
-    total_articles_scraped = 0
+    df = pd.read_csv(args.csv_file, usecols=['url'])
+    # listing dumps repeat articles, duplicates would share one pending_urls entry
+    article_urls = list(dict.fromkeys(df['url'].dropna().tolist()))
+    
+    # skip articles stored by earlier runs
+    state = CrawlState(args.state_db)
+    stored = state.seen(article_urls)
+    article_urls = [article_url for article_url in article_urls if article_url not in stored]
+    logger.info(f"{len(stored)} articles already stored, {len(article_urls)} to scrape")
 
-    for article_url in article_urls:
+    crawler = Crawler(concurrency=args.concurrency, rate_per_s=args.rate_per_s)
+    parsers = ParserPool(args.parse_processes)
+    
+    def scrape(article_url):
         # assuming the data-id is the last part of the URL path, like /news/finance/30203892/
         data_id = '/'.join(article_url.split('/')[3:])  # The portion of the URL you want as data-id
-        article_data_detail = scrape_article(article_url, data_id)
-        
-        if article_data_detail:
-            article_data_list_full.append(article_data_detail)
-            total_articles_scraped += 1
-        
-        if args.stop_at_article_count and total_articles_scraped >= args.stop_at_article_count:
-            logger.info(f"Reached the article limit of {args.stop_at_article_count}. Exiting.")
-            break
-
-    if article_data_list_full:
-        # create df
-        df_articles = pd.DataFrame(article_data_list_full)
-        
-        # save to csv
-        timestamp = datetime.now().strftime("%Y%m%d")
-        save_path = f'cryptonews_net_articles_{timestamp}.csv'
-        
-        df_articles.to_csv(save_path, index=False)
-        logger.info(f"Data saved to {save_path}")
+        article_data_detail = scrape_article(article_url, data_id, crawler, parsers)
+        return (article_url, article_data_detail) if article_data_detail else None
+    
+    timestamp = datetime.now().strftime("%Y%m%d")
+    save_path = args.output or f'cryptonews_net_articles_{timestamp}.csv'
+    
+    # url of each article waiting in the sink's batch
+    pending_urls = {}
+    
+    def on_flush(batch):
+        # only written articles count as stored, a failed run fetches the rest again
+        for article_data in batch:
+            article_url = pending_urls.pop(article_data['data_id'])
+            state.record(article_url, article_data['data_id'], article_data['content'], article_data['status'])
+        logger.info(f"Saved {len(batch)} articles to {sink.path}")
+    
+    with open_sink(save_path, batch_size=args.batch_size, on_flush=on_flush) as sink:
+        for article_url, article_data_detail in crawler.pipeline([article_urls], scrape, max_items=args.stop_at_article_count):
+            pending_urls[article_data_detail['data_id']] = article_url
+            sink.write(article_data_detail)
+    
+    if args.stop_at_article_count and sink.written >= args.stop_at_article_count:
+        logger.info(f"Reached the article limit of {args.stop_at_article_count}. Exiting.")
+    crawler.close()
+    parsers.close()
+    state.close()
+    
+    if sink.written:
+        logger.info(f"{sink.written} articles saved to {sink.path}")
     else:
         logger.error("No data to save.")
@@ -0,0 +1,122 @@
+import argparse
+import glob
+import html
+import os
+import statistics
+import time
+import pandas as pd
+from bs4 import BeautifulSoup
+import extract
+from extract import Extractor, EXTRACTORS
+
+#python bench_extract.py --fixtures_dir fixtures
+#python bench_extract.py --save_from cryptonews_net_articles_20241210.csv --limit 50
+
+DEFAULT_FIXTURES_DIR = 'fixtures'
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cryptonews_net_articles_20241210.csv')
+
+def parse_full_soup(page):
+    """what articles.py did before: a full html.parser tree, then find() per field"""
+    soup = BeautifulSoup(page, 'html.parser')
+    title_tag = soup.find('h1', class_='article_title')
+    content_tag = soup.find('div', class_='cn-content')
+    source_link_tag = soup.find('a', class_='source-host')
+    time_tag = soup.find('span', class_='datetime flex middle-xs')
+    image_tag = soup.find('div', class_='news-item detail content_text')
+    return {
+        'title': title_tag.get_text() if title_tag else None,
+        'content': content_tag.get_text(separator="\n", strip=True) if content_tag else None,
+        'source_link': source_link_tag.get('href') if source_link_tag else None,
+        'time_ago': time_tag.get_text(strip=True) if time_tag else None,
+        'image_url': image_tag.get('data-image') if image_tag else None
+    }
+
+def synthetic_page(row, related):
+    """an article page in cryptonews.net's markup built from a sample CSV row, with the usual page chrome"""
+    nav = ''.join(f'<li class="menu-item"><a href="/news/{i}/">Section {i}</a></li>' for i in range(60))
+    sidebar = ''.join(
+        f'<div class="row news-item start-xs" data-id="/news/market/{i}/">'
+        f'<div class="col-xs-3"><img src="/img/{i}.jpg" alt=""></div>'
+        f'<div class="col-xs-9"><a class="title" href="/news/market/{i}/">{html.escape(title)}</a>'
+        f'<span class="datetime">{i} h</span></div></div>'
+        for i, title in enumerate(related)
+    )
+    paragraphs = ''.join(f'<p>{html.escape(line)}</p>' for line in str(row['content']).split('\n'))
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>{html.escape(str(row["title"]))}</title>'
+        '<script>window.dataLayer = window.dataLayer || []; function gtag(){dataLayer.push(arguments);}</script>'
+        '<style>.news-item{display:flex}.cn-content p{margin:0 0 1em}</style></head><body>'
+        f'<header><nav><ul class="menu">{nav}</ul></nav></header><main class="row">'
+        f'<div class="news-item detail content_text" data-image="{html.escape(str(row["image_url"]))}">'
+        f'<h1 class="article_title">{html.escape(str(row["title"]))}</h1>'
+        '<div class="row middle-xs"><span class="datetime flex middle-xs">3 h</span>'
+        f'<a class="source-host" href="{html.escape(str(row["source_link"]))}">source</a></div>'
+        f'<div class="cn-content">{paragraphs}<!-- ad slot --><script>loadAds()</script></div></div>'
+        f'<aside class="col-xs-4">{sidebar}</aside></main>'
+        '<footer><p>cryptonews.net</p><script src="/js/app.js"></script></footer></body></html>'
+    )
+
+def load_fixtures(fixtures_dir):
+    """saved pages from fixtures_dir, or pages synthesized from the sample CSV when there are none"""
+    paths = sorted(glob.glob(os.path.join(fixtures_dir, '*.html')))
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                pages.append(f.read())
+        return pages, f"{len(pages)} saved pages from {fixtures_dir}"
+    df = pd.read_csv(SAMPLE_CSV).fillna('')
+    titles = df['title'].tolist()
+    pages = [synthetic_page(row, titles[i + 1:i + 41]).encode() for i, row in df.iterrows()]
+    return pages, f"{len(pages)} pages synthesized from {os.path.basename(SAMPLE_CSV)}"
+
+def save_fixtures(csv_file, fixtures_dir, limit):
+    from crawler import Crawler
+    os.makedirs(fixtures_dir, exist_ok=True)
+    urls = pd.read_csv(csv_file)['url'].tolist()[:limit]
+    crawler = Crawler()
+    for i, url in enumerate(urls):
+        response = crawler.fetch(url, conditional=False)
+        if response is not None:
+            with open(os.path.join(fixtures_dir, f'{i:05d}.html'), 'wb') as f:
+                f.write(response.content)
+    crawler.close()
+
+def time_per_page(parse, pages, repeat):
+    """median over repeats of the mean seconds per page"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            parse(page)
+        runs.append((time.perf_counter() - start) / len(pages))
+    return statistics.median(runs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixtures_dir', default=DEFAULT_FIXTURES_DIR, help='Directory of saved article pages (*.html)')
+    parser.add_argument('--save_from', help='CSV with a url column to download fixtures from first')
+    parser.add_argument('--limit', type=int, default=50, help='Pages to download with --save_from')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed passes over the fixtures')
+    args = parser.parse_args()
+    
+    if args.save_from:
+        save_fixtures(args.save_from, args.fixtures_dir, args.limit)
+    pages, source = load_fixtures(args.fixtures_dir)
+    print(f"{source}, {sum(map(len, pages)) / len(pages) / 1024:.0f} KiB on average")
+    
+    fields = EXTRACTORS['cryptonews_article_detail'].fields
+    candidates = {'full BeautifulSoup (before)': parse_full_soup}
+    if extract.lxml_html is not None:
+        candidates['lxml + compiled XPath'] = Extractor(fields, backend='lxml').extract
+    # the fallback used when lxml is not installed
+    candidates['BeautifulSoup + SoupStrainer'] = Extractor(fields, backend='soup').extract
+    
+    expected = [parse_full_soup(page) for page in pages]
+    baseline = None
+    for name, parse in candidates.items():
+        mismatches = sum(parse(page) != want for page, want in zip(pages, expected))
+        per_page = time_per_page(parse, pages, args.repeat)
+        baseline = baseline or per_page
+        print(f"{name:32s} {per_page * 1000:7.2f} ms/article  {baseline / per_page:5.1f}x  {mismatches} mismatches")
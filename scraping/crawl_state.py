@@ -0,0 +1,64 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+DEFAULT_STATE_DIR = 'crypto_data'
+
+def default_state_path(scraper):
+    """state file of one scraper, news.py's stored urls are exactly what articles.py still has to fetch"""
+    return os.path.join(DEFAULT_STATE_DIR, f'crawl_state_{scraper}.sqlite')
+
+class CrawlState:
+    """On-disk index of the articles one scraper already stored
+    
+    Keeps every stored article url with a hash of its content and when it was
+    fetched, so a run only fetches what is new since the last one. Safe to use
+    from the crawler's workers.
+    """
+    
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "url TEXT PRIMARY KEY, data_id TEXT, content_hash TEXT, fetched_at TEXT, status TEXT)"
+            )
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    def seen(self, urls):
+        """the subset of urls already stored"""
+        urls = list(urls)
+        seen = set()
+        with self._lock:
+            # stay under sqlite's bound parameter limit
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT url FROM articles WHERE url IN ({','.join('?' * len(chunk))})", chunk
+                )
+                seen.update(url for url, in rows)
+        return seen
+    
+    def record(self, url, data_id, content, status):
+        """mark url as stored, returns False if its content is unchanged since the last fetch"""
+        content_hash = hashlib.sha1((content or '').encode()).hexdigest()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT content_hash FROM articles WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?)",
+                (url, data_id, content_hash, datetime.utcnow().isoformat(), status)
+            )
+        return row is None or row[0] != content_hash
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
@@ -0,0 +1,176 @@
+import logging
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+headers = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# marks the end of a queue
+_DONE = object()
+
+class HostRateLimiter:
+    """spaces requests to the same host at least 1 / rate_per_s seconds apart"""
+    
+    def __init__(self, rate_per_s=2.0):
+        self.interval = 1.0 / rate_per_s if rate_per_s else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, url):
+        """reserve the next slot for url's host and sleep until it comes up"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class Crawler:
+    """Polite fetcher shared by the scrapers
+    
+    One pooled session, at most `concurrency` requests in flight and at most
+    `rate_per_s` requests per second to any one host. 429/5xx and connection
+    errors are retried with jittered backoff, and pages fetched before are
+    revalidated with ETag / Last-Modified so unchanged pages come back as 304.
+    """
+    
+    def __init__(self, concurrency=8, rate_per_s=2.0, timeout=(3.05, 15), max_retries=3,
+                 backoff_base=0.5, backoff_max=20, validators=None):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = HostRateLimiter(rate_per_s)
+        # url -> (etag, last_modified) of the last 200 response
+        self.validators = {} if validators is None else validators
+        self._validators_lock = threading.Lock()
+        
+        # one connection per worker plus one for the listing producer
+        adapter = HTTPAdapter(pool_connections=concurrency + 1, pool_maxsize=concurrency + 1)
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def close(self):
+        self.session.close()
+    
+    def _retry_delay(self, attempt, response=None):
+        """seconds to wait before the next attempt: Retry-After if given, else full-jitter backoff"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+    
+    def fetch(self, url, conditional=True):
+        """GET url, returns the response (200 or 304 Not Modified) or None if it failed"""
+        request_headers = {}
+        if conditional:
+            with self._validators_lock:
+                etag, last_modified = self.validators.get(url, (None, None))
+            if etag:
+                request_headers['If-None-Match'] = etag
+            if last_modified:
+                request_headers['If-Modified-Since'] = last_modified
+        
+        for attempt in range(self.max_retries + 1):
+            response = None
+            self.limiter.acquire(url)
+            try:
+                response = self.session.get(url, headers=request_headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Failed to retrieve {url}: {e}")
+                    return None
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                if attempt == self.max_retries:
+                    break
+            time.sleep(self._retry_delay(attempt, response))
+        
+        if response.status_code == 200:
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            if etag or last_modified:
+                with self._validators_lock:
+                    self.validators[url] = (etag, last_modified)
+        elif response.status_code != 304:
+            logger.error(f"Failed to retrieve {url}. Status code: {response.status_code}")
+            return None
+        return response
+    
+    def pipeline(self, batches, scrape, max_items=None):
+        """Yield scrape(item) for every item of every batch, as results come in
+        
+        `batches` is consumed lazily on a producer thread (e.g. one listing page
+        per batch) while `concurrency` workers scrape the items already found, so
+        listing and article fetches overlap. An empty batch ends the crawl, and so
+        does closing the generator or reaching max_items results. Items whose
+        scrape returns None or raises are left out.
+        """
+        work = queue.Queue(maxsize=self.concurrency * 4)
+        results = queue.Queue()
+        stop = threading.Event()
+        
+        def produce():
+            try:
+                for batch in batches:
+                    if stop.is_set() or not batch:
+                        break
+                    for item in batch:
+                        work.put(item)
+            except Exception as e:
+                logger.error(f"Listing failed: {e}")
+            finally:
+                for _ in range(self.concurrency):
+                    work.put(_DONE)
+        
+        def consume():
+            while True:
+                item = work.get()
+                if item is _DONE:
+                    break
+                # keep draining after a stop so the producer never blocks on a full queue
+                if stop.is_set():
+                    continue
+                try:
+                    results.put(scrape(item))
+                except Exception as e:
+                    logger.error(f"Failed to scrape {item}: {e}")
+            results.put(_DONE)
+        
+        threads = [threading.Thread(target=produce, daemon=True)]
+        threads += [threading.Thread(target=consume, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        
+        running = self.concurrency
+        produced = 0
+        try:
+            while running:
+                result = results.get()
+                if result is _DONE:
+                    running -= 1
+                elif result is not None:
+                    yield result
+                    produced += 1
+                    if max_items and produced >= max_items:
+                        break
+        finally:
+            stop.set()
@@ -0,0 +1,177 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml parses in C and is much faster, the BeautifulSoup path is the fallback
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# tag and attrs select the node the way soup.find(tag, attrs) would,
+# get is 'text', 'text_strip', 'text_lines' or 'attr:<name>', many returns every match
+Field = namedtuple('Field', ['tag', 'attrs', 'get', 'many'], defaults=[False])
+
+EXTRACTORS = {}
+
+if lxml_html is not None:
+    # get_text() skips script and style contents, so does this
+    _TEXT = etree.XPath('.//text()[not(parent::script or parent::style)]')
+
+def _xpath(field):
+    """XPath equivalent of soup.find(field.tag, field.attrs), a single class matches as one token of @class"""
+    conditions = []
+    for name, value in field.attrs.items():
+        if name == 'class' and ' ' not in value:
+            conditions.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {value} ')")
+        else:
+            conditions.append(f"@{name}='{value}'")
+    path = f"//{field.tag}" + ''.join(f"[{condition}]" for condition in conditions)
+    return path if field.many else f"({path})[1]"
+
+def _class_matches(wanted, value):
+    if value is None:
+        return False
+    if isinstance(value, list):
+        value = ' '.join(value)
+    if ' ' in wanted:
+        return value == wanted
+    return wanted in value.split()
+
+class Extractor:
+    """Pulls a fixed set of fields out of a page with selectors compiled once
+    
+    With lxml every field is one precompiled XPath over the parsed tree. Without
+    it BeautifulSoup only builds the nodes of interest (SoupStrainer) before the
+    same lookups run on that much smaller tree. backend='soup' forces the fallback.
+    """
+    
+    def __init__(self, fields, backend=None):
+        self.fields = fields
+        self.backend = backend or ('lxml' if lxml_html is not None else 'soup')
+        if self.backend == 'lxml':
+            self._xpaths = {name: etree.XPath(_xpath(field)) for name, field in fields.items()}
+        else:
+            self._strainer = _FieldStrainer(self._wanted)
+    
+    def _wanted(self, name, attrs):
+        """SoupStrainer filter: keep any tag one of the fields selects"""
+        for field in self.fields.values():
+            if name != field.tag:
+                continue
+            if all(
+                _class_matches(value, attrs.get('class')) if key == 'class' else attrs.get(key) == value
+                for key, value in field.attrs.items()
+            ):
+                return True
+        return False
+    
+    def extract(self, html):
+        """dict of field name -> value, None (or [] for many) when the page lacks it"""
+        if self.backend == 'lxml':
+            return self._extract_lxml(html)
+        return self._extract_soup(html)
+    
+    def _extract_lxml(self, html):
+        if not html or not html.strip():
+            return {name: [] if field.many else None for name, field in self.fields.items()}
+        root = lxml_html.fromstring(html)
+        result = {}
+        for name, field in self.fields.items():
+            nodes = [_lxml_value(node, field.get) for node in self._xpaths[name](root)]
+            result[name] = nodes if field.many else (nodes[0] if nodes else None)
+        return result
+    
+    def _extract_soup(self, html):
+        soup = BeautifulSoup(html, 'html.parser', parse_only=self._strainer)
+        result = {}
+        for name, field in self.fields.items():
+            if field.many:
+                result[name] = [_soup_value(tag, field.get) for tag in soup.find_all(field.tag, attrs=field.attrs)]
+            else:
+                tag = soup.find(field.tag, attrs=field.attrs)
+                result[name] = _soup_value(tag, field.get) if tag else None
+        return result
+
+class _FieldStrainer(SoupStrainer):
+    """SoupStrainer keeping only the tags wanted(name, attrs) accepts
+    
+    bs4 < 4.13 calls a name function with the attrs itself, newer versions ask
+    allow_tag_creation / allow_string_creation instead.
+    """
+    
+    def __init__(self, wanted):
+        super().__init__(wanted)
+        self._wanted_tag = wanted
+    
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self._wanted_tag(name, attrs or {})
+    
+    def allow_string_creation(self, string):
+        return False
+
+def _lxml_value(node, get):
+    if get.startswith('attr:'):
+        return node.get(get[5:])
+    texts = _TEXT(node)
+    if get == 'text':
+        return ''.join(texts)
+    stripped = [text.strip() for text in texts if text.strip()]
+    return '\n'.join(stripped) if get == 'text_lines' else ''.join(stripped)
+
+def _soup_value(tag, get):
+    if get.startswith('attr:'):
+        return tag.get(get[5:])
+    if get == 'text':
+        return tag.get_text()
+    return tag.get_text(separator='\n' if get == 'text_lines' else '', strip=True)
+
+def register(name, fields):
+    """add an extractor usable by name, including from the parse process pool"""
+    EXTRACTORS[name] = Extractor(fields)
+    return EXTRACTORS[name]
+
+def extract(name, html):
+    return EXTRACTORS[name].extract(html)
+
+class ParserPool:
+    """Runs extract() inline, or on `processes` worker processes when crawling at volume
+    
+    Crawler workers are threads, so with a pool they wait on a process each
+    instead of all parsing under the GIL.
+    """
+    
+    def __init__(self, processes=0):
+        self._pool = ProcessPoolExecutor(max_workers=processes) if processes else None
+    
+    def extract(self, name, html):
+        if self._pool is None:
+            return extract(name, html)
+        return self._pool.submit(extract, name, html).result()
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+# cryptonews.net listing page, used by news.py
+register('cryptonews_listing', {
+    'data_ids': Field('div', {'class': 'row news-item start-xs'}, 'attr:data-id', many=True)
+})
+
+# cryptonews.net article page as news.py reads it
+register('cryptonews_article', {
+    'title': Field('h1', {'class': 'article-title'}, 'text'),
+    'date_published': Field('meta', {'property': 'article:published_time'}, 'attr:content'),
+    'author': Field('span', {'class': 'author-name'}, 'text'),
+    'coins': Field('span', {'class': 'coin-name'}, 'text', many=True),
+    'content': Field('div', {'class': 'article-content'}, 'text')
+})
+
+# cryptonews.net article page as articles.py reads it
+register('cryptonews_article_detail', {
+    'title': Field('h1', {'class': 'article_title'}, 'text'),
+    'content': Field('div', {'class': 'cn-content'}, 'text_lines'),
+    'source_link': Field('a', {'class': 'source-host'}, 'attr:href'),
+    'time_ago': Field('span', {'class': 'datetime flex middle-xs'}, 'text_strip'),
+    'image_url': Field('div', {'class': 'news-item detail content_text'}, 'attr:data-image')
+})
@@ -1,9 +1,10 @@
-import requests
-from bs4 import BeautifulSoup
 import logging
 import argparse
 from datetime import datetime
-import pandas as pd
+from crawler import Crawler
+from crawl_state import CrawlState, default_state_path
+from extract import ParserPool
+from sinks import open_sink
 
 #python scrape_crypto.py --stop_at_article_count 100
 
@@ -11,129 +12,128 @@ import pandas as pd
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-
-def get_article_links(url, scraped_urls):
+def get_article_links(url, scraped_urls, crawler, state=None, parsers=None):
     logger.info(f"Fetching page: {url}")
-    response = requests.get(url, headers=headers)
+    # listings are always fetched in full, a 304 would hide articles a cut-short run never got to
+    response = crawler.fetch(url, conditional=False)
     
-    if response.status_code != 200:
-        logger.error(f"Failed to retrieve page. Status code: {response.status_code}")
+    if response is None:
         return []
     
     logger.info("Parsing page HTML...")
-    soup = BeautifulSoup(response.text, 'html.parser')
+    fields = (parsers or ParserPool()).extract('cryptonews_listing', response.content)
     
     article_data_list = []
-    for item in soup.find_all('div', class_='row news-item start-xs'):
-        data_id = item.get('data-id')
-        
+    for data_id in fields['data_ids']:
         if data_id and data_id not in scraped_urls:
             article_data = {
+                'data_id': data_id,
                 'url': 'https://cryptonews.net' + data_id  # construct full article URL
             }
             article_data_list.append(article_data)
             scraped_urls.add(data_id)
     
-    logger.info(f"Found {len(article_data_list)} articles on this page.")
+    # articles stored by earlier runs are not fetched again
+    if state is not None and article_data_list:
+        stored = state.seen(article_data['url'] for article_data in article_data_list)
+        article_data_list = [article_data for article_data in article_data_list if article_data['url'] not in stored]
+    
+    logger.info(f"Found {len(article_data_list)} new articles on this page.")
     return article_data_list
 
-def scrape_article(url):
+def scrape_article(url, crawler, parsers=None):
     logger.info(f"Scraping article: {url}")
-    response = requests.get(url, headers=headers)
+    # only articles not stored yet get here, a 304 would mean one whose run died before saving it
+    response = crawler.fetch(url, conditional=False)
     
-    if response.status_code != 200:
-        logger.error(f"Failed to retrieve article. Status code: {response.status_code}")
+    if response is None or response.status_code != 200:
         return None
     
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # title
-    title_tag = soup.find('h1', class_='article-title')
-    title = title_tag.get_text() if title_tag else 'No title found'
-    
-    # publish date (from meta tags)
-    date_published_tag = soup.find('meta', property='article:published_time')
-    date_published = date_published_tag['content'] if date_published_tag else 'No date found'
-    
-    # author (adjust selector if necessary)
-    author_tag = soup.find('span', class_='author-name')
-    author = author_tag.get_text() if author_tag else 'No author found'
-    
-    # coins mentioned (adjust the selector based on actual page structure)
-    coins = [coin.get_text() for coin in soup.find_all('span', class_='coin-name')]  # Adjust class
-    
-    # content (adjust based on actual class)
-    content_tag = soup.find('div', class_='article-content')
-    content = content_tag.get_text() if content_tag else 'No content found'
+    # selectors live in extract.py under 'cryptonews_article'
+    fields = (parsers or ParserPool()).extract('cryptonews_article', response.content)
     
     article_data = {
-        'title': title,
-        'date_published': date_published,
-        'author': author,
-        'coins': coins,
-        'content': content
+        'title': fields['title'] if fields['title'] is not None else 'No title found',
+        'date_published': fields['date_published'] if fields['date_published'] is not None else 'No date found',
+        'author': fields['author'] if fields['author'] is not None else 'No author found',
+        'coins': fields['coins'],
+        'content': fields['content'] if fields['content'] is not None else 'No content found'
     }
     
     return article_data
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--stop_at_page', type=int, help='Stop after this page number')
-    parser.add_argument('--stop_at_article_count', type=int, help='Stop after scraping this number of articles')
-    args = parser.parse_args()
-
-    base_url = 'https://cryptonews.net/'
-    scraped_urls = set()
-    article_data_list_full = []
+def listing_pages(base_url, scraped_urls, crawler, stop_at_page=None, state=None, parsers=None):
+    """yield the new article links of each listing page in turn
+    
+    Listings are newest first, so the first page without new articles ends the walk.
+    """
     page_number = 1
-    total_articles_scraped = 0
-
     while True:
         page_url = f"{base_url}?page={page_number}" if page_number > 1 else base_url
         
         logger.info(f"Scraping page {page_number} at {page_url}")
         
-        article_data_list = get_article_links(page_url, scraped_urls)
-        
+        article_data_list = get_article_links(page_url, scraped_urls, crawler, state, parsers)
         if not article_data_list:
             logger.info("No new articles found. Exiting.")
-            break
-
-        for article_data in article_data_list:
-            article_url = article_data['url']
-            article_data_detail = scrape_article(article_url)
-            
-            if article_data_detail:
-                article_data.update(article_data_detail) 
-                article_data_list_full.append(article_data)
-                total_articles_scraped += 1
-                logger.info(f"Successfully scraped: {article_url}")
-            
-            if args.stop_at_article_count and total_articles_scraped >= args.stop_at_article_count:
-                logger.info(f"Reached the article limit of {args.stop_at_article_count}. Exiting.")
-                break
-        
-        if args.stop_at_page and page_number >= args.stop_at_page:
-            logger.info(f"Reached the page limit of {args.stop_at_page}. Exiting.")
-            break
+        yield article_data_list
         
-        if args.stop_at_article_count and total_articles_scraped >= args.stop_at_article_count:
-            break
+        if stop_at_page and page_number >= stop_at_page:
+            logger.info(f"Reached the page limit of {stop_at_page}. Exiting.")
+            return
         
         page_number += 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stop_at_page', type=int, help='Stop after this page number')
+    parser.add_argument('--stop_at_article_count', type=int, help='Stop after scraping this number of articles')
+    parser.add_argument('--concurrency', type=int, default=8, help='Article pages fetched at once')
+    parser.add_argument('--rate_per_s', type=float, default=2.0, help='Most requests per second to the site')
+    parser.add_argument('--parse_processes', type=int, default=0, help='Parse pages on this many processes (0: in the crawler threads)')
+    parser.add_argument('--output', help='Output file, .csv/.jsonl/.parquet/.sqlite (default: crypto_data/raw/cryptonews_net_<date>.csv)')
+    parser.add_argument('--batch_size', type=int, default=100, help='Articles written per flush')
+    parser.add_argument('--state_db', default=default_state_path('news'), help='Crawl state index kept across runs of this scraper')
+    args = parser.parse_args()
+
+    base_url = 'https://cryptonews.net/'
+    scraped_urls = set()
+    timestamp = datetime.now().strftime("%Y%m%d")
+    save_path = args.output or f'crypto_data/raw/cryptonews_net_{timestamp}.csv'
+    state = CrawlState(args.state_db)
+    crawler = Crawler(concurrency=args.concurrency, rate_per_s=args.rate_per_s)
+    parsers = ParserPool(args.parse_processes)
     
-    if article_data_list_full:
-        # create df
-        df = pd.DataFrame(article_data_list_full)
-        
-        # save to CSV
-        timestamp = datetime.now().strftime("%Y%m%d")
-        save_path = f'/Users/juliaulzii/coincap/crypto_data/raw/cryptonews_net_{timestamp}.csv'
-        
-        df.to_csv(save_path, index=False)
-        logger.info(f"Data saved to {save_path}")
+    def scrape(article_data):
+        article_data_detail = scrape_article(article_data['url'], crawler, parsers)
+        if article_data_detail:
+            article_data.update(article_data_detail)
+            logger.info(f"Successfully scraped: {article_data['url']}")
+            return article_data
+        return None
+    
+    def on_flush(batch):
+        # only written articles count as stored, a failed run fetches the rest again
+        for article_data in batch:
+            state.record(article_data['url'], article_data['data_id'], article_data['content'], 'Scraped')
+        logger.info(f"Saved {len(batch)} articles to {sink.path}")
+    
+    # articles are written as they come in, article pages are fetched while the next listing pages are still being read
+    with open_sink(save_path, batch_size=args.batch_size, on_flush=on_flush) as sink:
+        for article_data in crawler.pipeline(
+            listing_pages(base_url, scraped_urls, crawler, args.stop_at_page, state, parsers),
+            scrape,
+            max_items=args.stop_at_article_count
+        ):
+            sink.write(article_data)
+    
+    if args.stop_at_article_count and sink.written >= args.stop_at_article_count:
+        logger.info(f"Reached the article limit of {args.stop_at_article_count}. Exiting.")
+    crawler.close()
+    parsers.close()
+    state.close()
+    
+    if sink.written:
+        logger.info(f"{sink.written} articles saved to {sink.path}")
     else:
         logger.error("No data to save.")
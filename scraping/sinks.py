@@ -0,0 +1,163 @@
+import csv
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+def _plain(value):
+    """value as something every format can store: lists as JSON, datetimes as ISO strings"""
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, default=str)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+class Sink:
+    """Append-only output for scraped records, written in batches
+    
+    write() buffers records and flushes every batch_size of them, so memory
+    stays flat and a crashed run keeps everything up to its last flush.
+    on_flush(records) runs after each batch is written, e.g. to mark those
+    articles as stored in the crawl state.
+    """
+    
+    def __init__(self, path, batch_size=100, on_flush=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.written = 0
+        self._batch = []
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def write(self, record):
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        self._write_batch(batch)
+        self.written += len(batch)
+        if self.on_flush:
+            self.on_flush(batch)
+    
+    def close(self):
+        self.flush()
+    
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+class JsonlSink(Sink):
+    """one JSON object per line, appended to path"""
+    
+    def _write_batch(self, batch):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in batch:
+                f.write(json.dumps(record, default=str, ensure_ascii=False) + '\n')
+
+class CsvSink(Sink):
+    """CSV appended to path, the header is written once when the file is new"""
+    
+    def _write_batch(self, batch):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if new_file:
+            self._columns = list(batch[0])
+        elif not hasattr(self, '_columns'):
+            with open(self.path, newline='', encoding='utf-8') as f:
+                self._columns = next(csv.reader(f))
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self._columns, extrasaction='ignore')
+            if new_file:
+                writer.writeheader()
+            writer.writerows({key: _plain(value) for key, value in record.items()} for record in batch)
+
+class SqliteSink(Sink):
+    """rows appended to table, created with the first batch's columns"""
+    
+    def __init__(self, path, batch_size=100, on_flush=None, table='articles'):
+        super().__init__(path, batch_size, on_flush)
+        self.table = table
+        self._conn = sqlite3.connect(path)
+        self._columns = None
+    
+    def _write_batch(self, batch):
+        if self._columns is None:
+            self._columns = list(batch[0])
+            columns = ', '.join(f'"{column}"' for column in self._columns)
+            placeholders = ', '.join('?' * len(self._columns))
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" ({columns})')
+            self._insert = f'INSERT INTO "{self.table}" ({columns}) VALUES ({placeholders})'
+        with self._conn:
+            self._conn.executemany(
+                self._insert,
+                [tuple(_plain(record.get(column)) for column in self._columns) for record in batch]
+            )
+    
+    def close(self):
+        super().close()
+        self._conn.close()
+
+class ParquetSink(Sink):
+    """one Parquet row group per batch, every column stored as a string
+    
+    The footer is written on close(), so the file is only readable once the
+    sink is closed (the scrapers close it even when a run fails). An existing
+    file is never overwritten, the run writes to name-1.parquet, name-2.parquet...
+    """
+    
+    def __init__(self, path, batch_size=1000, on_flush=None):
+        root, ext = os.path.splitext(path)
+        suffix = 0
+        while os.path.exists(path):
+            suffix += 1
+            path = f'{root}-{suffix}{ext}'
+        super().__init__(path, batch_size, on_flush)
+        self._writer = None
+    
+    def _write_batch(self, batch):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        columns = {}
+        for record in batch:
+            for key in record:
+                columns.setdefault(key, None)
+        if self._writer is None:
+            # the first batch fixes the columns, strings always fit whatever later batches hold
+            schema = pa.schema([pa.field(key, pa.string()) for key in columns])
+            self._writer = pq.ParquetWriter(self.path, schema, compression='zstd')
+        schema = self._writer.schema
+        rows = [
+            {name: None if record.get(name) is None else str(_plain(record[name])) for name in schema.names}
+            for record in batch
+        ]
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+    
+    def close(self):
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+
+SINKS = {
+    '.jsonl': JsonlSink,
+    '.csv': CsvSink,
+    '.sqlite': SqliteSink,
+    '.db': SqliteSink,
+    '.parquet': ParquetSink
+}
+
+def open_sink(path, batch_size=100, on_flush=None):
+    """sink for path, the format is picked by its extension (.jsonl, .csv, .sqlite/.db, .parquet)"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SINKS:
+        raise ValueError(f"Unsupported output format {ext!r}, use one of {', '.join(SINKS)}")
+    return SINKS[ext](path, batch_size=batch_size, on_flush=on_flush)
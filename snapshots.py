@@ -0,0 +1,166 @@
+import os
+import glob
+import logging
+import pandas as pd
+import numpy as np
+
+# typed columns per endpoint; everything else is stored as a string column
+SCHEMAS = {
+    "assets": {
+        "rank": "int64",
+        "supply": "float64",
+        "maxSupply": "float64",
+        "marketCapUsd": "float64",
+        "volumeUsd24Hr": "float64",
+        "priceUsd": "float64",
+        "changePercent24Hr": "float64",
+        "vwap24Hr": "float64"
+    },
+    "markets": {
+        "rank": "int64",
+        "priceQuote": "float64",
+        "priceUsd": "float64",
+        "volumeUsd24Hr": "float64",
+        "percentExchangeVolume": "float64",
+        "tradesCount24Hr": "float64",
+        "updated": "int64"
+    },
+    "exchanges": {
+        "rank": "int64",
+        "percentTotalVolume": "float64",
+        "volumeUsd": "float64",
+        "tradingPairs": "int64",
+        "updated": "int64"
+    },
+    "rates": {
+        "rateUsd": "float64"
+    },
+    "history": {
+        "priceUsd": "float64",
+        "time": "int64",
+        "circulatingSupply": "float64"
+    }
+}
+
+DEFAULT_ROOT = os.path.join("crypto_data", "snapshots")
+
+logger = logging.getLogger(__name__)
+
+
+def to_typed_frame(records, endpoint):
+    """DataFrame from api records (or a raw frame) with the endpoint's numeric columns parsed once"""
+    df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+    df = df.copy()
+    for column, dtype in SCHEMAS.get(endpoint, {}).items():
+        if column not in df:
+            continue
+        values = pd.to_numeric(df[column], errors="coerce")
+        if dtype == "int64":
+            # nullable ints for sparse columns, plain int64 when complete
+            values = values.astype("Int64") if values.isna().any() else values.astype(np.int64)
+        else:
+            values = values.astype(np.float64)
+        df[column] = values
+    if endpoint == "history" and "date" in df:
+        df = df.drop(columns=["date"])
+    return df
+
+
+def partition_dir(endpoint, date, root=DEFAULT_ROOT, key=None):
+    """endpoint=<endpoint>[/key=<key>]/date=<YYYYMMDD> directory"""
+    parts = [root, f"endpoint={endpoint}"]
+    if key:
+        parts.append(f"key={key}")
+    parts.append(f"date={date}")
+    return os.path.join(*parts)
+
+
+def write_snapshot(records, endpoint, date, root=DEFAULT_ROOT, key=None):
+    """write a typed Parquet snapshot, returns the file path"""
+    df = to_typed_frame(records, endpoint)
+    out_dir = partition_dir(endpoint, date, root=root, key=key)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "part-0.parquet")
+    df.to_parquet(path, index=False, compression="zstd")
+    return path
+
+
+def write_snapshot_stream(rows, endpoint, date, root=DEFAULT_ROOT, key=None, batch_rows=50_000):
+    """write an iterable of api records as a Parquet snapshot one row group per batch
+    
+    Only batch_rows records are held in memory at a time. Columns outside the
+    endpoint schema are stored as strings. The first batch fixes the file's
+    columns: later batches missing one get nulls, columns first seen in a later
+    batch are dropped with a warning. Returns (path, rows written).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    out_dir = partition_dir(endpoint, date, root=root, key=key)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "part-0.parquet")
+    tmp = path + ".tmp"
+    schema_types = SCHEMAS.get(endpoint, {})
+    writer = None
+    dropped = set()
+    total = 0
+    
+    def flush(batch):
+        nonlocal writer
+        df = to_typed_frame(batch, endpoint)
+        for column in df.columns:
+            if column not in schema_types:
+                df[column] = df[column].map(lambda v: None if v is None or v != v else str(v))
+        if writer is None:
+            schema = pa.schema([
+                pa.field(column, pa.int64() if schema_types.get(column) == "int64"
+                         else pa.float64() if column in schema_types else pa.string())
+                for column in df.columns
+            ])
+            writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+        unknown = [column for column in df.columns if column not in writer.schema.names and column not in dropped]
+        if unknown:
+            logger.warning(f"{endpoint} snapshot {date}: dropping columns missing from the first batch: {unknown}")
+            dropped.update(unknown)
+        # pages can omit a field entirely, those rows get nulls
+        df = df.reindex(columns=writer.schema.names)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        writer.write_table(table.select(writer.schema.names).cast(writer.schema))
+    
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            flush(batch)
+            total += len(batch)
+            batch = []
+    if batch or writer is None:
+        flush(batch)
+        total += len(batch)
+    
+    writer.close()
+    os.replace(tmp, path)
+    return path, total
+
+
+def list_dates(endpoint, root=DEFAULT_ROOT, key=None):
+    """available snapshot dates for an endpoint, oldest first"""
+    parent = os.path.dirname(partition_dir(endpoint, "x", root=root, key=key))
+    return sorted(os.path.basename(p)[len("date="):] for p in glob.glob(os.path.join(parent, "date=*")))
+
+
+def read_snapshot(endpoint, date=None, root=DEFAULT_ROOT, key=None, columns=None):
+    """read a snapshot back as a typed DataFrame; latest date when date is None"""
+    if date is None:
+        dates = list_dates(endpoint, root=root, key=key)
+        if not dates:
+            raise FileNotFoundError(f"no {endpoint} snapshots under {root}")
+        date = dates[-1]
+    path = os.path.join(partition_dir(endpoint, date, root=root, key=key), "part-0.parquet")
+    return pd.read_parquet(path, columns=columns)
+
+
+def import_csv(csv_path, endpoint, date, root=DEFAULT_ROOT, key=None):
+    """convert one of the legacy CSV dumps (e.g. data/raw_samples) into a snapshot"""
+    df = pd.read_csv(csv_path, dtype=str)
+    return write_snapshot(df, endpoint, date, root=root, key=key)